@@ -0,0 +1,75 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from src.excel_generator import (
+    TEMPLATE_FILE,
+    TemplateWorkbook,
+    generate_excel,
+    get_template,
+)
+from src.normalizer import ORDERED_HEADERS
+
+
+def make_records(rows):
+    return [
+        {header: f"{header} {row}" for header in ORDERED_HEADERS} for row in range(rows)
+    ]
+
+
+def bench_writer(write, output_dir, emails, rows):
+    """
+    Writes one .xlsx per email with `write(records, output_path)`.
+    Returns the average time per email in milliseconds.
+    """
+    start_time = time.perf_counter()
+    for index in range(emails):
+        write(make_records(rows), os.path.join(output_dir, f"email-{index}.xlsx"))
+    return (time.perf_counter() - start_time) * 1000 / emails
+
+
+def write_template(records, output_path):
+    sink = TemplateWorkbook(output_path, source_column=False)
+    sink.add_records(output_path, records)
+    sink.save()
+
+
+def main():
+    """
+    Benchmarks the per-email Excel writers: the pandas path against the template writer.
+    """
+    parser = argparse.ArgumentParser(description="Excel writer benchmark.")
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=5, help="Records per email.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    get_template(TEMPLATE_FILE)
+    template_load_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"Emails: {args.emails} | Rows per email: {args.rows}")
+    print(f"{'Template load (once)':<24} {template_load_ms:8.2f} ms")
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Silence the per-file success messages
+        with contextlib.redirect_stdout(io.StringIO()):
+            pandas_ms = bench_writer(generate_excel, output_dir, args.emails, args.rows)
+            template_ms = bench_writer(write_template, output_dir, args.emails, args.rows)
+    print(f"{'pandas (to_excel)':<24} {pandas_ms:8.2f} ms/email")
+    print(f"{'template (raw copy)':<24} {template_ms:8.2f} ms/email")
+    print(f"{'Speedup':<24} {pandas_ms / template_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import glob
+import os
+import time
+
+from src.parser import parse_eml
+from src.preprocessor import preprocess_text
+from src.extractor import extract_information, set_model_tier
+
+INPUT_GLOB = "data/input/*.eml"
+# Keyword-free quoted reply text, used to simulate long forwarded email threads
+QUOTED_REPLY_LINE = "> Thanks for the quick turnaround on this, we will review and get back to you."
+
+
+def bench_extraction(texts, repeat):
+    """
+    Times extract_information() over every text, `repeat` times.
+    Returns the average time per email in milliseconds.
+    """
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            extract_information(text)
+    elapsed = time.perf_counter() - start_time
+    return elapsed * 1000 / (repeat * len(texts))
+
+
+def main():
+    """
+    Benchmarks the regex-only extraction path on the sample emails.
+    """
+    parser = argparse.ArgumentParser(description="Extractor benchmark (regex-only).")
+    parser.add_argument("--input_glob", type=str, default=INPUT_GLOB)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--thread_kb",
+        type=int,
+        default=0,
+        help="Append this many KB of quoted reply text to each email.",
+    )
+    args = parser.parse_args()
+
+    # NER is disabled so only the regex hot path is measured
+    set_model_tier("none")
+    files = sorted(glob.glob(args.input_glob))
+    texts = [preprocess_text(parse_eml(f)) for f in files]
+    if args.thread_kb:
+        quoted_lines = args.thread_kb * 1024 // (len(QUOTED_REPLY_LINE) + 1)
+        quoted_thread = "\n".join([QUOTED_REPLY_LINE] * quoted_lines)
+        texts = [text + "\n" + quoted_thread for text in texts]
+
+    print(f"Emails: {len(texts)} | Repeat: {args.repeat} | Thread: {args.thread_kb} KB")
+    for f, text in zip(files, texts):
+        per_email_ms = bench_extraction([text], args.repeat)
+        print(f"{os.path.basename(f):<20} {per_email_ms:8.3f} ms/email")
+    print(f"{'Average':<20} {bench_extraction(texts, args.repeat):8.3f} ms/email")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from utils.logger import (
+    TEXT_DATE_FORMAT,
+    TEXT_LOG_FORMAT,
+    close_logger,
+    init_logger,
+    set_log_level,
+)
+
+
+def log_email(logger, eml_file, records):
+    """
+    Emits the log messages the runner writes for one email (cache miss, per-file output).
+    """
+    logger.info("🚀 Starting pipeline for: %s", eml_file)
+    logger.info("Module 1: Parsing complete.")
+    logger.info("Module 2: Preprocessing complete.")
+    logger.info("Module 3: Extraction complete.")
+    logger.info("Module 4: Normalization complete. %d records processed.", records)
+    logger.info("Module 5: %s creation complete.", ".xlsx")
+    logger.info("Pipeline finished successfully for %s!", eml_file)
+
+
+def sync_file_logger(log_file):
+    """
+    The previous setup: a FileHandler writing (and flushing) every record on the
+    caller's thread, with f-string messages formatted before the call.
+    """
+    logger = logging.getLogger("BenchSyncLogger")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler(log_file, mode="w", encoding="utf-8")
+    handler.setFormatter(logging.Formatter(TEXT_LOG_FORMAT, TEXT_DATE_FORMAT))
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def log_email_eager(logger, eml_file, records):
+    """
+    log_email() with the previous f-string messages and separator banner.
+    """
+    logger.info(f"\n{'='*100}")
+    logger.info(f"🚀 Starting pipeline for: {eml_file}")
+    logger.info("Module 1: Parsing complete.")
+    logger.info("Module 2: Preprocessing complete.")
+    logger.info(f"Module 3: Extraction complete.")
+    logger.info(f"Module 4: Normalization complete. {records} records processed.")
+    logger.info(f"Module 5: {'.xlsx'} creation complete.")
+    logger.info(f"Pipeline finished successfully for {eml_file}!\n")
+
+
+def measure(emails, log_func, logger, close):
+    """
+    Logs `emails` emails. Returns (microseconds per email spent in the logging calls,
+    microseconds per email until the log is written out).
+    """
+    start_time = time.perf_counter()
+    for index in range(emails):
+        log_func(logger, f"data/input/synthetic-{index:05d}.eml", index % 25)
+    calls_seconds = time.perf_counter() - start_time
+    close()
+    total_seconds = time.perf_counter() - start_time
+    return calls_seconds / emails * 1e6, total_seconds / emails * 1e6
+
+
+def main():
+    """
+    Measures the logging overhead per email of the previous synchronous FileHandler
+    and of the queued logger in its JSON and text formats and at WARNING level.
+    """
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark.")
+    parser.add_argument("--emails", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        log_file = os.path.join(work_dir, "pipeline.log")
+        logger, handler = sync_file_logger(log_file)
+        results = {
+            "FileHandler (previous)": measure(
+                args.emails, log_email_eager, logger, handler.close
+            )
+        }
+        for name, log_format, level in [
+            ("queue, json", "json", "INFO"),
+            ("queue, text", "text", "INFO"),
+            ("queue, WARNING level", "json", "WARNING"),
+        ]:
+            set_log_level(level)
+            logger = init_logger(log_format, log_file)
+            results[name] = measure(args.emails, log_email, logger, close_logger)
+        set_log_level("INFO")
+
+    for name, (calls_us, total_us) in results.items():
+        print(
+            f"{name:<24} | pipeline thread {calls_us:7.1f} us/email | "
+            f"until written {total_us:7.1f} us/email"
+        )
+
+
+if __name__ == "__main__":
+    main()
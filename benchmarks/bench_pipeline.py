@@ -0,0 +1,225 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate_emails import generate_corpus
+from src.parser import parse_eml
+from src.preprocessor import preprocess_text
+from src.extractor import extract_information, set_model_tier
+from src.normalizer import normalize_data
+from src.excel_generator import generate_output
+
+SIZES = [10, 100, 1000, 10000]
+BASELINE_FILE = "benchmarks/baselines/pipeline.json"
+RUNNER = "runner.py"
+MODULES = ["parse", "preprocess", "extract", "normalize", "output"]
+
+
+def bench_modules(eml_files, output_dir):
+    """
+    Runs the five modules in-process over every email and returns the total
+    time spent in each module, in seconds.
+    """
+    totals_ns = dict.fromkeys(MODULES, 0)
+    for eml_file in eml_files:
+        start_ns = time.perf_counter_ns()
+        raw_text = parse_eml(eml_file)
+        parsed_ns = time.perf_counter_ns()
+        totals_ns["parse"] += parsed_ns - start_ns
+        if not raw_text:
+            continue
+        clean_text = preprocess_text(raw_text)
+        preprocessed_ns = time.perf_counter_ns()
+        totals_ns["preprocess"] += preprocessed_ns - parsed_ns
+        records = extract_information(clean_text)
+        extracted_ns = time.perf_counter_ns()
+        totals_ns["extract"] += extracted_ns - preprocessed_ns
+        normalized_records = [normalize_data(record) for record in records]
+        normalized_ns = time.perf_counter_ns()
+        totals_ns["normalize"] += normalized_ns - extracted_ns
+        output_file = os.path.join(
+            output_dir, os.path.basename(eml_file).replace(".eml", ".xlsx")
+        )
+        # Silence the per-file success message
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_output(normalized_records, output_file, eml_file)
+        totals_ns["output"] += time.perf_counter_ns() - normalized_ns
+    return {module: total_ns / 1e9 for module, total_ns in totals_ns.items()}
+
+
+def bench_end_to_end(input_dir, work_dir, runner_args):
+    """
+    Runs runner.py on a folder in a child process (with `work_dir` as its working
+    directory, so outputs and logs stay out of the repository).
+    Returns (wall-clock seconds, peak RSS of the runner process in MB).
+    """
+    command = [
+        sys.executable,
+        os.path.abspath(RUNNER),
+        "--input_folder",
+        input_dir,
+        "--no-cache",
+    ] + runner_args
+    start_time = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # wait4 returns the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start_time
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"runner.py failed with exit code {process.returncode}")
+    # ru_maxrss is in KB on Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def run_size(corpus, size, work_dir, runner_args, skip_end_to_end):
+    """
+    Benchmarks the first `size` emails of the corpus.
+    """
+    input_dir = os.path.join(work_dir, f"input-{size}")
+    os.makedirs(input_dir)
+    eml_files = []
+    for eml_file in corpus[:size]:
+        linked_file = os.path.join(input_dir, os.path.basename(eml_file))
+        os.link(eml_file, linked_file)
+        eml_files.append(linked_file)
+    input_mb = sum(os.path.getsize(eml_file) for eml_file in eml_files) / 1024 / 1024
+
+    module_dir = os.path.join(work_dir, f"modules-{size}")
+    os.makedirs(module_dir)
+    module_seconds = bench_modules(eml_files, module_dir)
+    result = {
+        "emails": size,
+        "input_mb": round(input_mb, 2),
+        "modules": {
+            module: {
+                "seconds": round(seconds, 4),
+                "emails_per_sec": round(size / seconds, 1) if seconds else None,
+            }
+            for module, seconds in module_seconds.items()
+        },
+    }
+    if not skip_end_to_end:
+        runner_dir = os.path.join(work_dir, f"runner-{size}")
+        os.makedirs(runner_dir)
+        seconds, peak_rss_mb = bench_end_to_end(input_dir, runner_dir, runner_args)
+        result["end_to_end"] = {
+            "seconds": round(seconds, 3),
+            "emails_per_sec": round(size / seconds, 1),
+            "mb_per_sec": round(input_mb / seconds, 3),
+            "peak_rss_mb": round(peak_rss_mb, 1),
+        }
+    return result
+
+
+def flatten(result):
+    """
+    Flattens a size result into {"module.metric": value} for comparison.
+    """
+    values = {}
+    for module, metrics in result["modules"].items():
+        values[f"{module}.seconds"] = metrics["seconds"]
+    for metric, value in result.get("end_to_end", {}).items():
+        values[f"end_to_end.{metric}"] = value
+    return values
+
+
+def report(results, baseline):
+    """
+    Prints the results, with the relative difference to the baseline where available.
+    """
+    for size, result in results.items():
+        print(f"\n=== {size} emails ({result['input_mb']} MB) ===")
+        baseline_values = {}
+        if size in baseline:
+            baseline_values = flatten(baseline[size])
+            if baseline[size].get("config") != result["config"]:
+                print(f"Note: baseline config differs: {baseline[size].get('config')}")
+        for name, value in flatten(result).items():
+            line = f"{name:<28} {value:>12}"
+            baseline_value = baseline_values.get(name)
+            if baseline_value:
+                diff = 100 * (value - baseline_value) / baseline_value
+                line += f" | baseline {baseline_value:>12} | {diff:+7.1f}%"
+            print(line)
+
+
+def main():
+    """
+    Benchmarks each module and the end-to-end runner on synthetic corpora of
+    increasing size, and compares the results with the stored baselines.
+    """
+    parser = argparse.ArgumentParser(description="Pipeline scaling benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--ner_model",
+        type=str,
+        default="none",
+        help="NER model tier for the benchmark (default: none, regex-only).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Workers for the runner.")
+    parser.add_argument(
+        "--skip_end_to_end", action="store_true", help="Only time the modules in-process."
+    )
+    parser.add_argument("--baseline_file", type=str, default=BASELINE_FILE)
+    parser.add_argument(
+        "--save_baseline",
+        action="store_true",
+        help="Store these results as the new baseline (per size).",
+    )
+    args = parser.parse_args()
+
+    set_model_tier(args.ner_model)
+    runner_args = ["--ner_model", args.ner_model, "--workers", str(args.workers)]
+    try:
+        with open(args.baseline_file, "r", encoding="utf-8") as fp:
+            baseline = json.load(fp)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Corpora are prefixes of one seeded corpus, so every size sees the same emails
+        corpus = generate_corpus(
+            os.path.join(work_dir, "corpus"), max(args.sizes), args.seed
+        )
+        for size in sorted(args.sizes):
+            print(f"Benchmarking {size} emails...", flush=True)
+            results[str(size)] = run_size(
+                corpus, size, work_dir, runner_args, args.skip_end_to_end
+            )
+            results[str(size)]["config"] = {
+                "seed": args.seed,
+                "ner_model": args.ner_model,
+                "workers": args.workers,
+            }
+    report(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline_file), exist_ok=True)
+        with open(args.baseline_file, "w", encoding="utf-8") as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to '{args.baseline_file}'")
+
+
+if __name__ == "__main__":
+    main()
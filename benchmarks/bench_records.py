@@ -0,0 +1,84 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from src.extractor import iter_information, set_model_tier
+from src.normalizer import normalize_data, normalize_stream
+
+SPECIALTIES = ["Family Medicine", "Internal Medicine", "Cardiology", "Pediatrics"]
+
+
+def make_roster(rows, seed=0):
+    """
+    Returns the preprocessed text of a roster email with a `rows`-row provider table.
+    """
+    rng = random.Random(seed)
+    lines = [
+        "Please ADD the following providers to your network roster effective 9/1/2025.",
+        "Organization: Pacific Health Partners (TIN # 12-3456789)",
+        "Line of Business: Medicare, Commercial PPO",
+        "| Provider Name | NPI | License | Specialty | Effective Date |",
+    ]
+    for _ in range(rows):
+        lines.append(
+            f"| Dr. Provider {rng.randrange(10**6)} | {rng.randrange(10**9, 10**10)} | "
+            f"CA{rng.randrange(10000, 99999)} | {rng.choice(SPECIALTIES)} | "
+            f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2025 |"
+        )
+    lines.append("Best Regards,")
+    return "\n".join(lines)
+
+
+def measure(normalize, text):
+    """
+    Extracts and normalizes `text` into a list of records.
+    Returns (records, seconds, peak traced MB, MB still held by the records).
+    """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    records = normalize(text)
+    seconds = time.perf_counter() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, seconds, peak / 1024 / 1024, current / 1024 / 1024
+
+
+def main():
+    """
+    Compares the memory of the normalized records of a large roster: one dict per row
+    (normalize_data) against one RosterRecord per row (normalize_stream).
+    """
+    parser = argparse.ArgumentParser(description="Normalized record memory benchmark.")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    set_model_tier("none")
+    text = make_roster(args.rows)
+    paths = {
+        "dict": lambda text: [normalize_data(record) for record in iter_information(text)],
+        "RosterRecord": lambda text: list(normalize_stream(iter_information(text))),
+    }
+    results = {}
+    for name, normalize in paths.items():
+        records, seconds, peak_mb, held_mb = measure(normalize, text)
+        results[name] = records
+        print(
+            f"{name:<13} | {len(records)} records | {seconds:6.2f} s | "
+            f"peak {peak_mb:7.1f} MB | held {held_mb:7.1f} MB"
+        )
+        del records
+    assert results["dict"] == results["RosterRecord"], "The two paths differ"
+
+
+if __name__ == "__main__":
+    main()
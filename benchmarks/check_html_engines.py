@@ -0,0 +1,77 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from email import policy
+from email.parser import BytesParser
+
+from src.parser import html_to_text
+from src.preprocessor import preprocess_text
+
+INPUT_GLOB = "data/input/*.eml"
+
+
+def html_bodies(file_path):
+    """
+    Returns the decoded text/html parts of an .eml file.
+    """
+    with open(file_path, "rb") as fp:
+        msg = BytesParser(policy=policy.default).parse(fp)
+    return [
+        part.get_payload(decode=True)
+        for part in msg.walk()
+        if part.get_content_type() == "text/html"
+    ]
+
+
+def time_engine(html_body, engine, repeat):
+    """
+    Returns the average html_to_text() time in milliseconds for one engine.
+    """
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        html_to_text(html_body, engine)
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+def main():
+    """
+    Checks that the lxml and bs4 HTML engines produce the same text on every HTML
+    sample (after preprocessing) and compares their speed.
+    Exits with status 1 if any sample differs.
+    """
+    parser = argparse.ArgumentParser(description="HTML-to-text engine equivalence check.")
+    parser.add_argument("--input_glob", type=str, default=INPUT_GLOB)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    mismatches = 0
+    for file_path in sorted(glob.glob(args.input_glob)):
+        for html_body in html_bodies(file_path):
+            bs4_text = html_to_text(html_body, "bs4")
+            lxml_text = html_to_text(html_body, "lxml")
+            equal = preprocess_text(bs4_text) == preprocess_text(lxml_text)
+            mismatches += not equal
+            print(
+                f"{os.path.basename(file_path):<20} {'OK  ' if equal else 'DIFF'} "
+                f"raw-identical: {bs4_text == lxml_text!s:<5} | "
+                f"bs4: {time_engine(html_body, 'bs4', args.repeat):7.3f} ms | "
+                f"lxml: {time_engine(html_body, 'lxml', args.repeat):7.3f} ms"
+            )
+
+    print(f"Mismatches: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import argparse
+import html
+import os
+import random
+from email import policy
+from email.message import EmailMessage
+
+# --- Synthetic Roster Emails ---
+# Seeded generator of roster emails modeled on the samples in data/input. Each email
+# mixes some of: an HTML provider table of N rows, plain-text "Provider: ... / NPI: ..."
+# lines, labelled field blocks, Network(s) bullet lists, filler paragraphs (to vary the
+# size) and, occasionally, a large binary attachment.
+FIRST_NAMES = ["Sarah", "Michael", "Jennifer", "Robert", "Lisa", "Amanda", "Thomas", "Paul"]
+LAST_NAMES = ["Johnson", "Chen", "Martinez", "Kim", "Thompson", "Rodriguez", "Wilson"]
+SPECIALTIES = [
+    ("Family Medicine", "207Q00000X"),
+    ("Internal Medicine", "207R00000X"),
+    ("Cardiology", "207RC0000X"),
+    ("Dermatology", "207N00000X"),
+    ("Pediatrics", "208000000X"),
+    ("Emergency Medicine", "207P00000X"),
+]
+ORGANIZATIONS = [
+    "Pacific Health Partners",
+    "Coastal Medical Associates",
+    "Metropolitan Medical Group",
+    "Desert Valley Health Center",
+    "Southwest Dermatology Associates",
+]
+LINES_OF_BUSINESS = [
+    "Medicare",
+    "Commercial HMO",
+    "Commercial PPO",
+    "Medicaid",
+    "Medicare Advantage",
+]
+STATES = ["CA", "TX", "FL", "NV", "AZ"]
+TERM_REASONS = ["Voluntary", "Retirement", "Practice Closure", "Relocation"]
+ACTIONS = [("ADD", "to"), ("TERMINATE", "from"), ("UPDATE", "in")]
+FILLER_SENTENCE = (
+    "Please let us know if you need any additional information to process this request "
+    "and confirm once the roster has been updated on your side."
+)
+
+# Default mix of email content
+TABLE_RATE = 0.4
+PROVIDER_LINES_RATE = 0.5
+NETWORK_RATE = 0.6
+ATTACHMENT_RATE = 0.02
+MAX_TABLE_ROWS = 25
+MAX_FILLER_PARAGRAPHS = 40
+MAX_ATTACHMENT_KB = 2048
+
+
+def _provider(rng):
+    specialty, taxonomy = rng.choice(SPECIALTIES)
+    return {
+        "name": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "npi": f"{rng.randrange(10**9, 10**10)}",
+        "license": f"{rng.choice(STATES)}{rng.randrange(10000, 99999)}",
+        "specialty": specialty,
+        "taxonomy": taxonomy,
+        "reason": rng.choice(TERM_REASONS),
+    }
+
+
+def _date(rng):
+    return f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2025"
+
+
+def _field_block(rng, provider, organization):
+    return [
+        f"Provider Name: {provider['name']}",
+        f"NPI: {provider['npi']}",
+        f"License: {provider['license']}",
+        f"Specialty: {provider['specialty']}",
+        f"Practice Address: {rng.randint(100, 999)} Medical Center Dr, San Diego, CA 92101",
+        f"Phone: ({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}",
+        f"Fax: ({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}",
+        f"Medical Group: {organization} "
+        f"(TIN # {rng.randint(10, 99)}-{rng.randint(1000000, 9999999)})",
+        f"Group NPI: {rng.randrange(10**9, 10**10)}",
+    ]
+
+
+def _provider_lines(rng, count):
+    lines = []
+    for _ in range(count):
+        provider = _provider(rng)
+        lines.append(
+            f"Provider: {provider['name']} / License: {provider['license']} / "
+            f"NPI: {provider['npi']} / {provider['specialty']} {provider['taxonomy']}"
+        )
+    return lines
+
+
+def _network_lines(rng, organization):
+    lines = []
+    for line_of_business in rng.sample(LINES_OF_BUSINESS, rng.randint(1, 3)):
+        lines.append(f"Network(s): PPG#'s / {line_of_business}")
+        for _ in range(rng.randint(1, 4)):
+            ppg_id = f"{organization[:3].upper()}{rng.randint(100, 999)}"
+            lines.append(f"- {organization} - {ppg_id}")
+    return lines
+
+
+def _html_table(rng, rows):
+    header = ["Provider Name", "NPI", "License", "Specialty", "Term Reason"]
+    table_rows = ["<tr>" + "".join(f"<th>{column}</th>" for column in header) + "</tr>"]
+    for _ in range(rows):
+        provider = _provider(rng)
+        values = [
+            provider["name"],
+            provider["npi"],
+            provider["license"],
+            provider["specialty"],
+            provider["reason"],
+        ]
+        table_rows.append(
+            "<tr>" + "".join(f"<td>{html.escape(value)}</td>" for value in values) + "</tr>"
+        )
+    return '<table border="1">\n' + "\n".join(table_rows) + "\n</table>"
+
+
+def generate_email(
+    rng: random.Random,
+    index: int,
+    table_rate: float = TABLE_RATE,
+    provider_lines_rate: float = PROVIDER_LINES_RATE,
+    network_rate: float = NETWORK_RATE,
+    attachment_rate: float = ATTACHMENT_RATE,
+    max_table_rows: int = MAX_TABLE_ROWS,
+    max_attachment_kb: int = MAX_ATTACHMENT_KB,
+) -> bytes:
+    """
+    Returns one synthetic roster email as .eml bytes (multipart/alternative text and
+    HTML bodies, like the Outlook samples, plus an optional attachment).
+    """
+    action, preposition = rng.choice(ACTIONS)
+    organization = rng.choice(ORGANIZATIONS)
+    provider = _provider(rng)
+
+    lines = [
+        "Dear Network Team,",
+        f"Please {action} the following provider {preposition} your network roster "
+        f"effective {_date(rng)}.",
+    ]
+    table_rows = rng.randint(1, max_table_rows) if rng.random() < table_rate else 0
+    if not table_rows:
+        lines += _field_block(rng, provider, organization)
+    if rng.random() < provider_lines_rate:
+        lines += _provider_lines(rng, rng.randint(1, 3))
+    if rng.random() < network_rate:
+        lines.append(f"Line of Business: {', '.join(rng.sample(LINES_OF_BUSINESS, 2))}")
+        lines += _network_lines(rng, organization)
+    lines.append(f"Effective Date: {_date(rng)}")
+    # Filler paragraphs vary the email size, mostly small with a long tail
+    filler = [FILLER_SENTENCE] * int(rng.paretovariate(1.5)) if rng.random() < 0.5 else []
+    lines += filler[:MAX_FILLER_PARAGRAPHS]
+    lines += ["Best Regards,", "Network Administration Team"]
+
+    # Tags are separated by newlines, as in the HTML written by mail clients
+    paragraphs = [f"<p>{html.escape(line)}</p>" for line in lines]
+    if table_rows:
+        paragraphs.insert(2, _html_table(rng, table_rows))
+    html_body = "<html><body>\n" + "\n".join(paragraphs) + "\n</body></html>"
+
+    msg = EmailMessage()
+    msg["From"] = "Network Administration <roster@example.com>"
+    msg["To"] = "Provider Data <providers@example.com>"
+    msg["Subject"] = f"Synthetic roster email {index}"
+    msg.set_content("\n".join(lines))
+    msg.add_alternative(html_body, subtype="html")
+    if rng.random() < attachment_rate:
+        size = rng.randint(max_attachment_kb // 4, max_attachment_kb) * 1024
+        msg.add_attachment(
+            rng.randbytes(size),
+            maintype="application",
+            subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            filename="roster.xlsx",
+        )
+    return msg.as_bytes(policy=policy.SMTP)
+
+
+def generate_corpus(output_dir: str, count: int, seed: int = 0, **options) -> list:
+    """
+    Writes `count` synthetic emails to `output_dir` and returns their paths.
+    The same seed always produces the same corpus.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        path = os.path.join(output_dir, f"synthetic-{index:05d}.eml")
+        with open(path, "wb") as fp:
+            fp.write(generate_email(rng, index, **options))
+        paths.append(path)
+    return paths
+
+
+def main():
+    """
+    Generates a synthetic roster email corpus.
+    """
+    parser = argparse.ArgumentParser(description="Synthetic roster email generator.")
+    parser.add_argument("--output_folder", type=str, required=True)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--table_rate", type=float, default=TABLE_RATE)
+    parser.add_argument("--max_table_rows", type=int, default=MAX_TABLE_ROWS)
+    parser.add_argument("--attachment_rate", type=float, default=ATTACHMENT_RATE)
+    parser.add_argument("--max_attachment_kb", type=int, default=MAX_ATTACHMENT_KB)
+    args = parser.parse_args()
+
+    paths = generate_corpus(
+        args.output_folder,
+        args.count,
+        args.seed,
+        table_rate=args.table_rate,
+        max_table_rows=args.max_table_rows,
+        attachment_rate=args.attachment_rate,
+        max_attachment_kb=args.max_attachment_kb,
+    )
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    print(
+        f"Generated {len(paths)} emails ({total_bytes / 1024 / 1024:.1f} MB) "
+        f"in '{args.output_folder}'"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,75 +8,797 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
+import asyncio
+import cProfile
 import json
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, repeat
 
 # Import the primary function from each of our modules
-from src.parser import parse_eml
-from src.preprocessor import preprocess_text
-from src.extractor import extract_information
-from src.normalizer import normalize_data
-from src.excel_generator import generate_excel
-from utils.logger import init_logger
+from src.parser import (
+    HTML_ENGINES,
+    parse_eml,
+    parse_eml_bytes,
+    set_html_engine,
+    set_parse_mode,
+)
+from src.preprocessor import prepare_text
+from src.extractor import (
+    extract_free_text,
+    get_ner_cache_max_entries,
+    get_ner_cache_stats,
+    get_nlp,
+    iter_information,
+    ner_fallback_text,
+    prefetch_entities,
+    resolved_model_name,
+    set_model_tier,
+    set_table_workers,
+)
+from src.normalizer import get_date_cache_stats, normalize_stream
+from src.excel_generator import (
+    OUTPUT_FORMATS,
+    create_sink,
+    generate_output,
+    output_extension,
+    output_supports_append,
+    set_output_format,
+)
+from src.result_cache import (
+    MAX_CACHE_BYTES,
+    file_sha256,
+    get_result_cache_stats,
+    has_records,
+    load_records,
+    output_is_current,
+    result_cache_key,
+    set_result_cache,
+    stamp_output,
+    store_records,
+)
+from utils.logger import (
+    LOG_BACKUP_COUNT,
+    LOG_FORMATS,
+    LOG_LEVELS,
+    LOG_MAX_BYTES,
+    close_logger,
+    drain_log_records,
+    init_logger,
+    init_worker_logger,
+    set_log_level,
+)
+from utils.metrics import (
+    METRICS_FILE,
+    PROFILE_FILE,
+    init_metrics_file,
+    new_metrics,
+    stage_summary,
+    timed_iter,
+    timed_stage,
+    write_metrics,
+)
 
 OUTPUT_DIR = "data/output"
+# "workbook" is the original name of the "consolidated" output mode
+OUTPUT_MODES = ["per_file", "consolidated", "workbook"]
+# Consolidated output file, without extension (it depends on the output format)
+CONSOLIDATED_FILE_STEM = os.path.join(OUTPUT_DIR, "roster_output")
+# Watch mode: record of processed files (path, mtime, size, hash)
+MANIFEST_FILE = "data/watch_manifest.json"
+# Watch mode: files modified more recently than this may still be being written
+WATCH_SETTLE_SECONDS = 1.0
 
 
-def process_file(input_file, logger):
-    logger.info(f"\n{'='*100}")
-    logger.info(f"🚀 Starting pipeline for: {input_file}")
-    start_time = time.time()
-
+def run_text_modules(input_file, metrics, data=None):
+    """
+    Runs Modules 1-2 and the regex part of Module 3 on one email and returns its
+    FreeTextData (None if no text could be extracted). The NER fallback and the
+    table rows are left to run_modules().
+    """
     # --- Module 1: Parse Email ---
-    if not os.path.exists(input_file):
-        logger.error(f"Input file not found at '{input_file}'")
-        return None, None
-    raw_text = parse_eml(input_file)
+    with timed_stage(metrics, "parse"):
+        raw_text = parse_eml(input_file) if data is None else parse_eml_bytes(data)
     if not raw_text:
-        logger.error("Could not extract text from email. Skipping.")
-        return None, None
-    logger.info("Module 1: Parsing complete.")
+        return None
+    metrics["text_chars"] = len(raw_text)
 
     # --- Module 2: Preprocess Text ---
-    clean_text = preprocess_text(raw_text)
+    # The line index lets the extractor segment the text without re-splitting it
+    with timed_stage(metrics, "preprocess"):
+        prepared_text = prepare_text(raw_text)
+
+    # --- Module 3: Extract Information (free-text zone, regex rules) ---
+    with timed_stage(metrics, "extract"):
+        return extract_free_text(prepared_text)
+
+
+def run_modules(input_file, logger, metrics, data=None, free_text=None):
+    """
+    Runs Modules 1-4 on one email and returns the normalized records (None on failure).
+    Stage durations, sizes and NER usage are recorded in `metrics`.
+    `data` is the content of the .eml file, if it was already read; `free_text` is the
+    result of run_text_modules(), if Modules 1-2 already ran (batched NER mode).
+    """
+    if free_text is None:
+        free_text = run_text_modules(input_file, metrics, data)
+    if free_text is None:
+        logger.error("Could not extract text from email. Skipping.")
+        return None
+    logger.info("Module 1: Parsing complete.")
     logger.info("Module 2: Preprocessing complete.")
 
     # --- Module 3: Extract Information ---
-    extracted_records = extract_information(clean_text)
-    if not extracted_records:
+    # Table rows are parsed lazily and stream into Module 4 one chunk at a time;
+    # taking the first record runs the NER fallback, and the time spent parsing
+    # each later row is counted as "extract" too (see below)
+    ner_before = get_ner_cache_stats()
+    with timed_stage(metrics, "extract"):
+        extracted_records = iter_information(free_text)
+        first_record = next(extracted_records, None)
+    ner_after = get_ner_cache_stats()
+    ner_model_runs = ner_after["misses"] - ner_before["misses"]
+    metrics["ner_model_runs"] = ner_model_runs
+    metrics["ner_invoked"] = ner_model_runs + ner_after["hits"] - ner_before["hits"] > 0
+    if ner_model_runs:
+        metrics["stages_ns"]["extract_ner"] = ner_after["model_ns"] - ner_before["model_ns"]
+    if first_record is None:
         logger.error("No records were extracted from the email. Skipping.")
-        return None, None
-    logger.info(f"Module 3: Extraction complete.")
+        return None
+    logger.info("Module 3: Extraction complete.")
     # Uncomment the following line to log raw extracted data
     # logger.info(
     #     "--- Raw Extracted Data ---\n" + json.dumps(extracted_records, indent=2)
     # )
 
     # --- Module 4: Normalize Data ---
-    normalized_records = []
-    for record in extracted_records:
-        normalized_record = normalize_data(record)
-        normalized_records.append(normalized_record)
-    logger.info(f"Module 4: Normalization complete. {len(normalized_records)} records processed.")
+    extract_ns = metrics["stages_ns"]["extract"]
+    with timed_stage(metrics, "normalize"):
+        # Normalized records are kept as a list for the result cache and the metrics
+        normalized_records = list(
+            normalize_stream(
+                chain([first_record], timed_iter(metrics, "extract", extracted_records))
+            )
+        )
+    # The rows parsed while normalizing were timed as "extract", not "normalize"
+    metrics["stages_ns"]["normalize"] -= metrics["stages_ns"]["extract"] - extract_ns
+    logger.info("Module 4: Normalization complete. %d records processed.", len(normalized_records))
     # Uncomment the following line to log normalized data
     # logger.info(
     #     "--- Final Normalized Data ---\n" + json.dumps(normalized_records, indent=2)
     # )
+    return normalized_records
 
-    # --- Module 5: Generate Excel ---
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-    output_file = os.path.join(
-        OUTPUT_DIR, f"{os.path.splitext(os.path.basename(input_file))[0]}.xlsx"
+
+def process_file(input_file, logger, emit_records=None, prefetched=None):
+    """
+    Runs the pipeline on one email. By default Module 5 writes one output file per email;
+    if `emit_records(input_file, records)` is given, the records are handed to it instead.
+    `prefetched` is the (cache key, metrics, FreeTextData or None) of an email that
+    went through phase 1 of the batched NER mode.
+    Returns (TAT in seconds, output file, metrics record), or Nones on failure.
+    """
+    logger.info("🚀 Starting pipeline for: %s", input_file)
+    start_time = time.time()
+
+    if not os.path.exists(input_file):
+        logger.error("Input file not found at '%s'", input_file)
+        return None, None, None
+    cache_key, metrics, free_text = prefetched or (None, new_metrics(input_file), None)
+
+    normalized_records = load_or_run_modules(
+        input_file, logger, metrics, free_text=free_text, cache_key=cache_key
     )
-    generate_excel(normalized_records, output_file)
-    logger.info("Module 5: .xlsx creation complete.")
-    logger.info(f"Pipeline finished successfully for {input_file}!\n")
+    if normalized_records is None:
+        return None, None, None
+
+    if emit_records is not None:
+        output_file = None
+        with timed_stage(metrics, "output"):
+            emit_records(input_file, normalized_records)
+        logger.info("Module 5: Records added to the consolidated output.")
+    else:
+        output_file = write_output(input_file, normalized_records, logger, metrics)
+    logger.info("Pipeline finished successfully for %s!", input_file)
 
     end_time = time.time()
     tat_seconds = end_time - start_time
-    return tat_seconds, output_file
+    return tat_seconds, output_file, metrics
+
+
+def load_or_run_modules(
+    input_file, logger, metrics, data=None, free_text=None, cache_key=None
+):
+    """
+    Returns the normalized records of one email from the result cache, or runs
+    Modules 1-4 and caches them. Returns None on failure.
+    `data` is the content of the .eml file, if it was already read; `free_text` is
+    the result of run_text_modules(), if Modules 1-2 already ran; `cache_key` is
+    the result cache key, if it was already computed.
+    """
+    # --- Result Cache: skip Modules 1-4 for unchanged emails ---
+    if cache_key is None:
+        cache_key = result_cache_key(input_file, data)
+    metrics["cache_key"] = cache_key
+    normalized_records = load_records(cache_key)
+    if normalized_records is not None:
+        metrics["cache_hit"] = True
+        logger.info(
+            "Result cache hit: Modules 1-4 skipped. %d records loaded.", len(normalized_records)
+        )
+    else:
+        normalized_records = run_modules(input_file, logger, metrics, data, free_text)
+        if normalized_records is None:
+            return None
+        store_records(cache_key, normalized_records)
+    metrics["records"] = len(normalized_records)
+    return normalized_records
+
+
+def write_output(input_file, normalized_records, logger, metrics):
+    """
+    Module 5: writes the output file of one email and returns its path.
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_file = os.path.join(
+        OUTPUT_DIR,
+        f"{os.path.splitext(os.path.basename(input_file))[0]}{output_extension()}",
+    )
+    # The output is only reused if it was written from the same cached records
+    if metrics["cache_hit"] and output_is_current(output_file, metrics["cache_key"]):
+        logger.info(
+            "Module 5: %s already exists for cached result, skipped.", output_extension()
+        )
+    else:
+        with timed_stage(metrics, "output"):
+            generate_output(normalized_records, output_file, input_file)
+            stamp_output(output_file, metrics["cache_key"])
+        logger.info("Module 5: %s creation complete.", output_extension())
+    return output_file
+
+
+def prefetch_ner(eml_files, logger, batch_size, n_process):
+    """
+    Phase 1 of the batched NER mode: runs Modules 1-2 and the regex extraction of each
+    email, then runs the free-text zones that need the NER fallback through the model
+    in batches with nlp.pipe. Returns {eml_file: (cache key, metrics, FreeTextData)},
+    so phase 2 picks up each email where phase 1 left it (FreeTextData is None for
+    emails with a cached result).
+    """
+    if get_nlp() is None:
+        return {}
+    prefetched = {}
+    texts = []
+    for eml_file in eml_files:
+        if not os.path.exists(eml_file):
+            continue
+        cache_key = result_cache_key(eml_file)
+        metrics = new_metrics(eml_file)
+        # Emails with a cached result never reach the NER fallback. The lookup itself
+        # (and its hit/miss count) is left to phase 2.
+        free_text = None if has_records(cache_key) else run_text_modules(eml_file, metrics)
+        prefetched[eml_file] = (cache_key, metrics, free_text)
+        if free_text is None:
+            continue
+        ner_text = ner_fallback_text(free_text)
+        if ner_text is not None:
+            texts.append(ner_text)
+    model_runs = prefetch_entities(texts, batch_size=batch_size, n_process=n_process)
+    logger.info(
+        "Batched NER: %d text(s) from %d file(s) run through nlp.pipe.",
+        model_runs,
+        len(eml_files),
+    )
+    return prefetched
+
+
+def process_chunk(
+    eml_files, logger, batch_ner=False, ner_batch_size=64, ner_n_process=1, emit_records=None
+):
+    """
+    Processes a chunk of files, optionally prefetching their NER results in one batch.
+    """
+    prefetched = {}
+    if batch_ner:
+        prefetched = prefetch_ner(eml_files, logger, ner_batch_size, ner_n_process)
+    tat_results = []
+    for eml_file in eml_files:
+        tat, output_file, metrics = process_file(
+            eml_file, logger, emit_records, prefetched.pop(eml_file, None)
+        )
+        if tat is not None:
+            tat_results.append(
+                {"file": eml_file, "output": output_file, "tat_seconds": tat, "metrics": metrics}
+            )
+    return tat_results
+
+
+def configure_pipeline(args):
+    """
+    Applies the module-level pipeline options selected on the command line.
+    """
+    if args.ner_model:
+        set_model_tier(args.ner_model)
+    set_table_workers(args.table_workers)
+    set_parse_mode(args.stream_parse, args.max_body_mb * 1024 * 1024)
+    set_html_engine(args.html_engine)
+    set_output_format(args.output_format)
+    set_log_level(args.log_level)
+    set_result_cache(
+        enabled=not args.no_cache,
+        max_cache_bytes=args.cache_max_mb * 1024 * 1024,
+        # Keyed on the model the tier resolves to (e.g. auto -> en_core_web_trf)
+        options=f"ner={resolved_model_name()};"
+        f"html={args.html_engine};stream={args.stream_parse};max_body_mb={args.max_body_mb}",
+    )
+
+
+def collect_stats():
+    """
+    Returns the NER cache, date cache and result cache counters of this process.
+    """
+    return {
+        "ner": get_ner_cache_stats(),
+        "date": get_date_cache_stats(),
+        "result_cache": get_result_cache_stats(),
+    }
+
+
+def _init_worker(args):
+    """
+    Pool worker initializer: applies the pipeline options. A worker loads the spaCy
+    model once, on its first email that needs the NER fallback.
+    """
+    configure_pipeline(args)
+
+
+def _process_chunk_in_worker(eml_files, batch_ner, ner_batch_size, consolidate):
+    """
+    Runs process_chunk() in a pool worker. Log records are buffered in memory and
+    returned with the results, so only the parent process writes to the log file.
+    With `consolidate`, the normalized records are returned too, for the parent's output sink.
+    """
+    logger = init_worker_logger()
+    stats_before = collect_stats()
+    emitted = [] if consolidate else None
+
+    def emit_records(eml_file, records):
+        emitted.append((eml_file, records))
+
+    tat_results = process_chunk(
+        eml_files,
+        logger,
+        batch_ner,
+        ner_batch_size,
+        emit_records=emit_records if consolidate else None,
+    )
+    stats = {
+        name: {key: value - stats_before[name][key] for key, value in counters.items()}
+        for name, counters in collect_stats().items()
+    }
+    return tat_results, drain_log_records(logger), stats, emitted
+
+
+def create_executor(args):
+    """
+    Creates the worker process pool. Each worker loads the spaCy model at most once.
+    """
+    return ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args,)
+    )
+
+
+def process_folder_parallel(eml_files, logger, args, executor, sink=None):
+    """
+    Fans the files out over a process pool and collects results, cache stats
+    and log records back in the parent, in input order. With a consolidated
+    output sink, the parent appends each chunk's records to it as they arrive.
+    """
+    # Like the serial path, a batched chunk must fit in the worker's NER cache, or
+    # entities prefetched early in the chunk are evicted before they are used
+    chunk_size = (
+        min(args.ner_batch_size, get_ner_cache_max_entries()) if args.batch_ner else 1
+    )
+    chunks = [
+        eml_files[start : start + chunk_size]
+        for start in range(0, len(eml_files), chunk_size)
+    ]
+    tat_results = []
+    stats = {name: dict.fromkeys(counters, 0) for name, counters in collect_stats().items()}
+    for chunk_results, log_records, chunk_stats, emitted in executor.map(
+        _process_chunk_in_worker,
+        chunks,
+        repeat(args.batch_ner),
+        repeat(args.ner_batch_size),
+        repeat(sink is not None),
+    ):
+        for record in log_records:
+            logger.handle(record)
+        tat_results.extend(chunk_results)
+        for eml_file, records in emitted or ():
+            sink.add_records(eml_file, records)
+        for name, counters in chunk_stats.items():
+            for key, value in counters.items():
+                stats[name][key] += value
+    return tat_results, stats
+
+
+# --- Asyncio Pipeline ---
+# With --async_pipeline, reading, extraction and writing overlap: a reader task loads
+# the .eml files in a thread pool, extraction tasks send them to the process pool for
+# Modules 1-4, and a writer task runs Module 5 in the thread pool. At most
+# --queue_size emails are in flight between their read and their written output,
+# including the results waiting for an earlier email to be written, so a slow email
+# or stage makes the reader wait (backpressure). Memory grows with the size of the
+# emails in flight, not with the number of files. With --stream_parse, the reader
+# only checks each file and the worker streams it, so attachments are never loaded
+# whole into the parent or sent to the pool.
+ASYNC_IO_THREADS = 4
+
+
+def read_eml_bytes(eml_file, streaming=False):
+    """
+    Returns the content of an .eml file, or None with `streaming`: the file is only
+    checked here, and the worker parses it with the streaming parser.
+    """
+    if streaming:
+        os.stat(eml_file)
+        return None
+    with open(eml_file, "rb") as fp:
+        return fp.read()
+
+
+def _run_modules_in_worker(eml_file, data):
+    """
+    Pool worker: returns the normalized records (None on failure) and metrics of one
+    email read by the parent, with the worker's log records and counters.
+    """
+    logger = init_worker_logger()
+    stats_before = collect_stats()
+    logger.info("🚀 Starting pipeline for: %s", eml_file)
+    metrics = new_metrics(eml_file)
+    normalized_records = load_or_run_modules(eml_file, logger, metrics, data)
+    stats = {
+        name: {key: value - stats_before[name][key] for key, value in counters.items()}
+        for name, counters in collect_stats().items()
+    }
+    return normalized_records, metrics, drain_log_records(logger), stats
+
+
+async def process_files_async(eml_files, logger, args, executor, sink=None):
+    """
+    Processes the files with the asyncio pipeline. Outputs are written in input order
+    (results that finish early wait for the ones before them); the TAT of an email
+    runs from its read to its written output. An email is read only when fewer than
+    --queue_size emails are in flight, so at most that many results wait.
+    """
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(maxsize=args.queue_size)
+    write_queue = asyncio.Queue(maxsize=args.queue_size)
+    # Held from the read of an email until its output is written
+    in_flight = asyncio.Semaphore(args.queue_size)
+    # Two extraction tasks per worker keep the pool busy while results are handed on
+    extract_tasks = 2 * max(args.workers, 1)
+    tat_results = []
+    stats = {name: dict.fromkeys(counters, 0) for name, counters in collect_stats().items()}
+
+    def write_records(eml_file, normalized_records, metrics):
+        if sink is None:
+            return write_output(eml_file, normalized_records, logger, metrics)
+        with timed_stage(metrics, "output"):
+            sink.add_records(eml_file, normalized_records)
+        logger.info("Module 5: Records added to the consolidated output.")
+        return None
+
+    async def read_files():
+        for index, eml_file in enumerate(eml_files):
+            await in_flight.acquire()
+            start_time = time.time()
+            readable = True
+            try:
+                data = await loop.run_in_executor(
+                    io_executor, read_eml_bytes, eml_file, args.stream_parse
+                )
+            except OSError as e:
+                logger.error("Could not read '%s': %s", eml_file, e)
+                readable, data = False, None
+            await read_queue.put((index, eml_file, start_time, readable, data))
+        for _ in range(extract_tasks):
+            await read_queue.put(None)
+
+    async def extract():
+        while (item := await read_queue.get()) is not None:
+            index, eml_file, start_time, readable, data = item
+            result = None
+            if readable:
+                result = await loop.run_in_executor(
+                    executor, _run_modules_in_worker, eml_file, data
+                )
+            await write_queue.put((index, eml_file, start_time, result))
+
+    async def write_result(eml_file, start_time, result):
+        normalized_records, metrics, log_records, worker_stats = result
+        for record in log_records:
+            logger.handle(record)
+        for name, counters in worker_stats.items():
+            for key, value in counters.items():
+                stats[name][key] += value
+        if normalized_records is None:
+            return
+        output_file = await loop.run_in_executor(
+            io_executor, write_records, eml_file, normalized_records, metrics
+        )
+        logger.info("Pipeline finished successfully for %s!", eml_file)
+        tat_results.append(
+            {
+                "file": eml_file,
+                "output": output_file,
+                "tat_seconds": time.time() - start_time,
+                "metrics": metrics,
+            }
+        )
+
+    async def write_outputs():
+        pending = {}
+        next_index = 0
+        while (item := await write_queue.get()) is not None:
+            pending[item[0]] = item[1:]
+            while next_index in pending:
+                eml_file, start_time, result = pending.pop(next_index)
+                next_index += 1
+                if result is not None:
+                    await write_result(eml_file, start_time, result)
+                in_flight.release()
+
+    # The one writer task runs one write at a time, so the sink is never used concurrently
+    with ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS) as io_executor:
+        writer = asyncio.create_task(write_outputs())
+        try:
+            await asyncio.gather(read_files(), *(extract() for _ in range(extract_tasks)))
+            await write_queue.put(None)
+            await writer
+        finally:
+            writer.cancel()
+    return tat_results, stats
+
+
+def process_files(eml_files, logger, args, executor=None, sink=None):
+    """
+    Processes a list of files, in parallel if a worker pool is given.
+    Returns the TAT results and the cache stats of this run.
+    """
+    if executor is not None and args.async_pipeline:
+        return asyncio.run(process_files_async(eml_files, logger, args, executor, sink))
+    if executor is not None:
+        return process_folder_parallel(eml_files, logger, args, executor, sink)
+
+    tat_results = []
+    stats_before = collect_stats()
+    # In batched NER mode, files are handled in chunks that fit in the NER cache,
+    # so the prefetched entities are still cached when each file is extracted
+    chunk_size = get_ner_cache_max_entries() if args.batch_ner else max(len(eml_files), 1)
+    for start in range(0, len(eml_files), chunk_size):
+        tat_results.extend(
+            process_chunk(
+                eml_files[start : start + chunk_size],
+                logger,
+                args.batch_ner,
+                args.ner_batch_size,
+                args.ner_n_process,
+                sink.add_records if sink is not None else None,
+            )
+        )
+    stats = {
+        name: {key: value - stats_before[name][key] for key, value in counters.items()}
+        for name, counters in collect_stats().items()
+    }
+    return tat_results, stats
+
+
+def consolidated_file(args):
+    return args.workbook_file or f"{CONSOLIDATED_FILE_STEM}{output_extension()}"
+
+
+def process_batch(eml_files, logger, args, executor=None, output_file=None, append=False):
+    """
+    Processes a batch of files in the selected output mode. In "consolidated" mode,
+    the records of the whole batch are written to one output file (appended to it
+    with `append`, if the output format supports it).
+    """
+    if args.output_mode == "per_file":
+        return process_files(eml_files, logger, args, executor)
+
+    sink = create_sink(
+        output_file or consolidated_file(args),
+        append=append,
+        sheet_per_email=args.sheet_per_email,
+    )
+    tat_results, stats = process_files(eml_files, logger, args, executor, sink)
+    write_start_time = time.time()
+    output_file = sink.save()
+    logger.info(
+        "Module 5: Consolidated output with %d records written in %.2f seconds.",
+        sink.total_rows,
+        time.time() - write_start_time,
+    )
+    for r in tat_results:
+        r["output"] = output_file
+    return tat_results, stats
+
+
+def log_summary(tat_results, stats, logger, run_start_time):
+    """
+    Logs the TAT analysis, per-stage timings and cache statistics of a run, and
+    appends the per-email metrics to the metrics file.
+    """
+    logger.info("\n%s", "=" * 100)
+    logger.info("%s file(s) saved in '%s'", output_extension(), OUTPUT_DIR)
+    logger.info("\n%s", "=" * 100)
+
+    # --- TAT Analysis ---
+    logger.info("=== Turnaround Time (TAT) Analysis ===")
+    total_tat = sum(r["tat_seconds"] for r in tat_results)
+    for r in tat_results:
+        logger.info(
+            "File: %s | TAT: %.2f seconds | Output: %s",
+            os.path.basename(r["file"]),
+            r["tat_seconds"],
+            os.path.basename(r["output"] or "-"),
+        )
+    logger.info("Total files processed: %d", len(tat_results))
+    logger.info("Total TAT: %.2f seconds", total_tat)
+    if tat_results:
+        logger.info("Average TAT per file: %.2f seconds", total_tat / len(tat_results))
+    logger.info("Wall-clock time: %.2f seconds", time.time() - run_start_time)
+
+    # --- Per-Stage Timing ---
+    metrics_records = [r["metrics"] for r in tat_results]
+    if metrics_records:
+        write_metrics(metrics_records)
+        logger.info("=== Per-Stage Timing (ms) ===")
+        for stage, timing in stage_summary(metrics_records).items():
+            logger.info(
+                "%-12s | p50: %9.2f | p95: %9.2f | max: %9.2f | emails: %d",
+                stage,
+                timing["p50"] / 1e6,
+                timing["p95"] / 1e6,
+                timing["max"] / 1e6,
+                timing["count"],
+            )
+        ner_emails = sum(1 for metrics in metrics_records if metrics["ner_invoked"])
+        logger.info(
+            "NER fallback invoked for %d of %d email(s).", ner_emails, len(metrics_records)
+        )
+        logger.info("Per-email metrics written to '%s'", METRICS_FILE)
+
+    ner_stats = stats["ner"]
+    logger.info(
+        "NER cache: %d hits | %d misses (model runs) | model time %.2f seconds",
+        ner_stats["hits"],
+        ner_stats["misses"],
+        ner_stats["model_ns"] / 1e9,
+    )
+    date_stats = stats["date"]
+    logger.info(
+        "Date cache: %d hits | %d misses | %d dateutil fallbacks",
+        date_stats["hits"],
+        date_stats["misses"],
+        date_stats["fallbacks"],
+    )
+    cache_stats = stats["result_cache"]
+    cache_lookups = cache_stats["hits"] + cache_stats["misses"]
+    if cache_lookups:
+        logger.info(
+            "Result cache: %d hits | %d misses | hit rate %.0f%% | %d evictions",
+            cache_stats["hits"],
+            cache_stats["misses"],
+            cache_stats["hits"] / cache_lookups * 100,
+            cache_stats["evictions"],
+        )
+
+
+def list_eml_files(input_folder):
+    return [
+        os.path.join(input_folder, f)
+        for f in os.listdir(input_folder)
+        if f.lower().endswith(".eml")
+    ]
+
+
+def load_manifest(manifest_file):
+    """
+    Loads the watch-mode manifest: {path: {"mtime", "size", "sha256"}}.
+    """
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest, manifest_file):
+    """
+    Writes the manifest atomically, so an interrupted write never corrupts it.
+    """
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    temp_file = f"{manifest_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=1)
+    os.replace(temp_file, manifest_file)
+
+
+def find_changed_files(input_folder, manifest):
+    """
+    Returns the .eml files that are new or whose content changed since they were
+    recorded in the manifest, with their new manifest entries. Files still being
+    written (modified less than WATCH_SETTLE_SECONDS ago) are left for the next poll.
+    """
+    changed = {}
+    now = time.time()
+    for eml_file in list_eml_files(input_folder):
+        try:
+            stat = os.stat(eml_file)
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime < WATCH_SETTLE_SECONDS:
+            continue
+        entry = manifest.get(eml_file)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            continue
+        # Only hash files whose mtime/size changed; a touched but identical file is skipped
+        sha256 = file_sha256(eml_file)
+        new_entry = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha256}
+        if entry and entry["sha256"] == sha256:
+            manifest[eml_file] = new_entry
+            continue
+        changed[eml_file] = new_entry
+    return changed
+
+
+def watch_folder(args, logger):
+    """
+    Daemon mode: polls the input folder and runs only new or modified emails through
+    the pipeline, keeping the spaCy model (and worker pool) warm between polls.
+    """
+    manifest = load_manifest(args.manifest)
+    executor = create_executor(args) if args.workers > 1 or args.async_pipeline else None
+    if executor is None:
+        # Load the model up front, so the first email does not pay for it
+        get_nlp()
+    logger.info(
+        "Watching '%s' every %ss (%d file(s) already in manifest).",
+        args.input_folder,
+        args.poll_seconds,
+        len(manifest),
+    )
+    try:
+        while True:
+            changed = find_changed_files(args.input_folder, manifest)
+            if changed:
+                run_start_time = time.time()
+                eml_files = sorted(changed)
+                logger.info("Found %d new or modified .eml file(s).", len(eml_files))
+                # CSV/JSONL output is appended to; formats that cannot be appended to
+                # (xlsx, Parquet) get a new timestamped file per poll
+                output_file = consolidated_file(args)
+                if not output_supports_append():
+                    output_stem, output_ext = os.path.splitext(output_file)
+                    output_file = f"{output_stem}_{time.strftime('%Y%m%d-%H%M%S')}{output_ext}"
+                tat_results, stats = process_batch(
+                    eml_files, logger, args, executor, output_file, append=True
+                )
+                # Failed files are recorded too, so they are retried only once they change
+                manifest.update(changed)
+                save_manifest(manifest, args.manifest)
+                log_summary(tat_results, stats, logger, run_start_time)
+            time.sleep(args.poll_seconds)
+    except KeyboardInterrupt:
+        logger.info("Watch mode stopped.")
+    finally:
+        save_manifest(manifest, args.manifest)
+        if executor is not None:
+            executor.shutdown()
 
 
 def main():
@@ -90,55 +812,250 @@ def main():
     parser.add_argument(
         "--input_folder", type=str, help="Path to a folder containing .eml files."
     )
+    parser.add_argument(
+        "--ner_model",
+        type=str,
+        help="spaCy model tier for the NER fallback: auto, trf, md, sm or none "
+        "(defaults to the ROSTER_NER_MODEL env var, else auto).",
+    )
+    parser.add_argument(
+        "--batch_ner",
+        action="store_true",
+        help="For --input_folder, run the NER fallback for all emails in batches before extraction.",
+    )
+    parser.add_argument(
+        "--ner_batch_size", type=int, default=64, help="Batch size for nlp.pipe."
+    )
+    parser.add_argument(
+        "--ner_n_process", type=int, default=1, help="Number of processes for nlp.pipe."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="For --input_folder, number of worker processes to process files in parallel.",
+    )
+    parser.add_argument(
+        "--async_pipeline",
+        action="store_true",
+        help="For --input_folder, overlap file reads, extraction (in --workers processes) "
+        "and output writes with an asyncio pipeline.",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=int,
+        default=16,
+        help="With --async_pipeline, maximum number of emails waiting between two stages.",
+    )
+    parser.add_argument(
+        "--table_workers",
+        type=int,
+        default=1,
+        help="Processes used to parse the tables of very large multi-table emails in parallel.",
+    )
+    parser.add_argument(
+        "--stream_parse",
+        action="store_true",
+        help="Parse .eml files in streaming mode, skipping attachments without decoding them.",
+    )
+    parser.add_argument(
+        "--max_body_mb",
+        type=int,
+        default=10,
+        help="In streaming mode, maximum size (MB) kept for a text/html or text/plain body.",
+    )
+    parser.add_argument(
+        "--html_engine",
+        type=str,
+        choices=HTML_ENGINES,
+        default="lxml",
+        help="HTML-to-text engine: lxml (fast, default) or bs4 (BeautifulSoup).",
+    )
+    parser.add_argument(
+        "--no_cache",
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk result cache and reprocess every email.",
+    )
+    parser.add_argument(
+        "--cache_max_mb",
+        type=int,
+        default=MAX_CACHE_BYTES // (1024 * 1024),
+        help="Maximum size (MB) of the result cache before old entries are evicted.",
+    )
+    parser.add_argument(
+        "--output_mode",
+        type=str,
+        choices=OUTPUT_MODES,
+        default="per_file",
+        help="per_file: one output file per email (default). "
+        "consolidated (or workbook): one output file for the whole batch.",
+    )
+    parser.add_argument(
+        "--output_format",
+        "--output-format",
+        type=str,
+        choices=OUTPUT_FORMATS,
+        default="xlsx",
+        help="Output file format: xlsx (default), csv, jsonl or parquet (requires pyarrow).",
+    )
+    parser.add_argument(
+        "--workbook_file",
+        "--output_file",
+        type=str,
+        help="In consolidated output mode, path of the output file "
+        "(default: data/output/roster_output.<format>).",
+    )
+    parser.add_argument(
+        "--sheet_per_email",
+        action="store_true",
+        help="In consolidated xlsx output mode, write one sheet per email instead of a Source File column.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const=PROFILE_FILE,
+        help="Run under cProfile and dump the pstats to this path "
+        f"(default: {PROFILE_FILE}). With --workers, only the main process is profiled.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and process only new or modified .eml files in --input_folder.",
+    )
+    parser.add_argument(
+        "--poll_seconds",
+        type=float,
+        default=5.0,
+        help="In watch mode, seconds between scans of the input folder.",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=MANIFEST_FILE,
+        help="In watch mode, path of the manifest of already processed files.",
+    )
+    parser.add_argument(
+        "--log_level",
+        type=str.upper,
+        choices=LOG_LEVELS,
+        default="INFO",
+        help="Minimum level of the messages written to the log (default: INFO).",
+    )
+    parser.add_argument(
+        "--log_format",
+        type=str,
+        choices=LOG_FORMATS,
+        default="json",
+        help="Log file format: one JSON object per line, or the plain text layout.",
+    )
+    parser.add_argument(
+        "--log_max_mb",
+        type=int,
+        default=LOG_MAX_BYTES // (1024 * 1024),
+        help="Size in MB at which the log file is rotated.",
+    )
+    parser.add_argument(
+        "--log_backups",
+        type=int,
+        default=LOG_BACKUP_COUNT,
+        help="Number of rotated log files to keep.",
+    )
     args = parser.parse_args()
 
+    logger = init_logger(
+        args.log_format,
+        max_bytes=args.log_max_mb * 1024 * 1024,
+        backup_count=args.log_backups,
+    )
+    try:
+        run_main(args, logger)
+    finally:
+        # Write out the records still queued for the log writer thread
+        close_logger()
+
+
+def run_main(args, logger):
+    """
+    Configures the pipeline and runs it, under cProfile if requested.
+    """
+    try:
+        configure_pipeline(args)
+    except ValueError as e:
+        logger.error(str(e))
+        return
+    init_metrics_file()
+
+    if not args.profile:
+        run_pipeline(args, logger)
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        run_pipeline(args, logger)
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(args.profile) or ".", exist_ok=True)
+        profiler.dump_stats(args.profile)
+        logger.info(
+            "cProfile stats written to '%s' (view with: python -m pstats %s)",
+            args.profile,
+            args.profile,
+        )
+
+
+def run_pipeline(args, logger):
+    """
+    Runs the pipeline in the mode selected on the command line.
+    """
     tat_results = []
-    logger = init_logger()
+    run_start_time = time.time()
+    if args.async_pipeline and args.batch_ner:
+        logger.warning("--batch_ner is ignored with --async_pipeline: NER runs per email.")
+
+    if args.watch:
+        if not args.input_folder or not os.path.exists(args.input_folder):
+            logger.error("--watch requires an existing --input_folder.")
+            return
+        watch_folder(args, logger)
+        return
 
     if args.input_file:
-        tat, output_file = process_file(args.input_file, logger)
-        if tat is not None:
-            tat_results.append(
-                {"file": args.input_file, "output": output_file, "tat_seconds": tat}
-            )
+        if args.output_mode != "per_file":
+            tat_results, stats = process_batch([args.input_file], logger, args)
+        else:
+            tat, output_file, metrics = process_file(args.input_file, logger)
+            if tat is not None:
+                tat_results.append(
+                    {
+                        "file": args.input_file,
+                        "output": output_file,
+                        "tat_seconds": tat,
+                        "metrics": metrics,
+                    }
+                )
+            stats = collect_stats()
     elif args.input_folder:
         if not os.path.exists(args.input_folder):
-            logger.error(f"Input folder not found at '{args.input_folder}'")
+            logger.error("Input folder not found at '%s'", args.input_folder)
             return
-        eml_files = [
-            os.path.join(args.input_folder, f)
-            for f in os.listdir(args.input_folder)
-            if f.lower().endswith(".eml")
-        ]
+        eml_files = list_eml_files(args.input_folder)
         if not eml_files:
-            logger.error(f"No .eml files found in '{args.input_folder}'")
+            logger.error("No .eml files found in '%s'", args.input_folder)
             return
-        logger.info(f"Found {len(eml_files)} .eml files in '{args.input_folder}'")
-        for eml_file in eml_files:
-            tat, output_file = process_file(eml_file, logger)
-            if tat is not None:
-                tat_results.append(
-                    {"file": eml_file, "output": output_file, "tat_seconds": tat}
-                )
+        logger.info("Found %d .eml files in '%s'", len(eml_files), args.input_folder)
+        if args.workers > 1 or args.async_pipeline:
+            logger.info("Processing with %d worker processes.", args.workers)
+            with create_executor(args) as executor:
+                tat_results, stats = process_batch(eml_files, logger, args, executor)
+        else:
+            tat_results, stats = process_batch(eml_files, logger, args)
     else:
         logger.error("Please provide either --input_file or --input_folder.")
         return
 
-    logger.info(f"\n{'='*100}")
-    logger.info(f".xlsx file(s) saved in '{OUTPUT_DIR}'")
-    logger.info(f"\n{'='*100}")
-
-    # --- TAT Analysis ---
-    logger.info("=== Turnaround Time (TAT) Analysis ===")
-    total_tat = sum(r["tat_seconds"] for r in tat_results)
-    for r in tat_results:
-        logger.info(
-            f"File: {os.path.basename(r['file'])} | TAT: {r['tat_seconds']:.2f} seconds | Output: {os.path.basename(r['output'])}"
-        )
-    logger.info(f"Total files processed: {len(tat_results)}")
-    logger.info(f"Total TAT: {total_tat:.2f} seconds")
-    if tat_results:
-        logger.info(f"Average TAT per file: {total_tat / len(tat_results):.2f} seconds")
+    log_summary(tat_results, stats, logger, run_start_time)
 
 
 if __name__ == "__main__":
@@ -8,10 +8,27 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
+import csv
+import importlib.util
+import io
 import json
 import os
+import posixpath
+import re
+import zipfile
+from abc import ABC, abstractmethod
+from itertools import chain
 import pandas as pd
-from typing import List, Dict, Any
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+from src.normalizer import ORDERED_HEADERS, RosterRecord
 # from parser import parse_eml
 # from preprocessor import preprocess_text
 # from extractor import extract_information
@@ -20,27 +37,72 @@ from typing import List, Dict, Any
 
 OUTPUT_DIR = "data/output"
 
+# --- Output Sinks ---
+OUTPUT_FORMATS = ["xlsx", "xlsx_template", "csv", "jsonl", "parquet"]
+SOURCE_FILE_HEADER = "Source File"
+OUTPUT_HEADERS = [SOURCE_FILE_HEADER] + ORDERED_HEADERS
+# Rows buffered per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+# Rows buffered before the template writer flushes them to the sheet
+TEMPLATE_WRITE_ROWS = 1000
+
+_output_format = "xlsx"
+
+# --- Excel Template ---
+TEMPLATE_FILE = "data/templates/Output Format.xlsx"
+TEMPLATE_SHEET = "Output"
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+RELATIONSHIP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_RELATIONSHIP_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DIMENSION_RE = re.compile(r"<dimension [^>]*/>")
+ROW_NUMBER_RE = re.compile(r'<row r="(\d+)"')
+CELL_STYLE_RE = re.compile(r'<c r="[A-Z]+\d+" s="(\d+)"')
+ROW_SPANS_RE = re.compile(r' spans="[^"]*"')
+
+_templates = {}
+
+# --- Consolidated Workbook ---
+CONSOLIDATED_SHEET_TITLE = "Records"
+# Excel limits: rows per sheet and characters per sheet title
+MAX_SHEET_ROWS = 1048576
+MAX_SHEET_TITLE_LENGTH = 31
+INVALID_SHEET_TITLE_CHARS = str.maketrans({char: "_" for char in "[]:*?/\\"})
+
+
+def _rename_columns(record: Dict[str, Any]):
+    """
+    Renames short column keys to their full output headers, in place.
+    """
+    if "Line Of Business" in record:
+        record["Line Of Business (Medicare/Commercial/Medical)"] = record.pop(
+            "Line Of Business"
+        )
+    if "Transaction Type" in record:
+        record["Transaction Type (Add/Update/Term)"] = record.pop(
+            "Transaction Type"
+        )
+
 
 def generate_excel(records: List[Dict[str, Any]], output_path: str):
     """
-    Generates an Excel file from a list of normalized data records.
+    Generates an Excel file from a list of normalized data records
+    (RosterRecord objects or dicts).
     """
     if not records:
         print("⚠️ Warning: No data records to write to Excel.")
         return
 
-    for record in records:
-        if "Line Of Business" in record:
-            record["Line Of Business (Medicare/Commercial/Medical)"] = record.pop(
-                "Line Of Business"
-            )
-        if "Transaction Type" in record:
-            record["Transaction Type (Add/Update/Term)"] = record.pop(
-                "Transaction Type"
-            )
+    if all(isinstance(record, RosterRecord) for record in records):
+        # Build the DataFrame from the row tuples, without per-record dicts
+        df = pd.DataFrame(
+            [record.to_row() for record in records], columns=ORDERED_HEADERS
+        )
+    else:
+        for record in records:
+            _rename_columns(record)
 
-    # Create a pandas DataFrame from our list of records
-    df = pd.DataFrame(records)
+        # Create a pandas DataFrame from our list of records
+        df = pd.DataFrame(records)
 
     try:
         # Write the DataFrame to an Excel file
@@ -51,6 +113,506 @@ def generate_excel(records: List[Dict[str, Any]], output_path: str):
         print(f"\n❌ Error generating Excel file: {e}")
 
 
+def set_output_format(output_format: str):
+    """
+    Selects the output format of Module 5: xlsx (default), csv, jsonl or parquet.
+    """
+    global _output_format
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format '{output_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}"
+        )
+    if output_format == "parquet" and not parquet_available():
+        raise ValueError("The parquet output format requires pyarrow to be installed.")
+    _output_format = output_format
+
+
+def get_output_format() -> str:
+    return _output_format
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def output_extension() -> str:
+    """
+    Returns the file extension of the selected output format.
+    """
+    return OUTPUT_SINKS[_output_format].extension
+
+
+def output_supports_append() -> bool:
+    """
+    Returns True if the selected output format can add rows to an existing file.
+    """
+    return OUTPUT_SINKS[_output_format].supports_append
+
+
+def _record_values(record: Dict[str, Any]) -> Sequence[Any]:
+    """
+    Returns the values of a record (RosterRecord or dict) in ORDERED_HEADERS order.
+    """
+    if isinstance(record, RosterRecord):
+        return record.to_row()
+    _rename_columns(record)
+    return [record.get(header) for header in ORDERED_HEADERS]
+
+
+def _record_row(source_name: str, record: Dict[str, Any]) -> List[Any]:
+    """
+    Returns the values of a record in OUTPUT_HEADERS order.
+    """
+    return [source_name, *_record_values(record)]
+
+
+class OutputSink(ABC):
+    """
+    Base class of the batch output writers. The records of each email are appended
+    with add_records() as they arrive and the output is finalized with save().
+    add_records() accepts any iterable of records, so a generator is written as it
+    is consumed, without being materialized.
+    Columns follow ORDERED_HEADERS, preceded by a "Source File" column.
+    Sinks with `supports_append` can add rows to an existing output file.
+    A sink that does not implement both methods cannot be instantiated.
+    """
+
+    extension = ""
+    supports_append = False
+
+    def __init__(self, output_path: str, append: bool = False):
+        self.output_path = output_path
+        self.append = append and self.supports_append
+        self.total_rows = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    @abstractmethod
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        """
+        Appends the normalized records of one email.
+        """
+
+    @abstractmethod
+    def save(self) -> Optional[str]:
+        """
+        Finalizes the output and returns its path, or None if nothing was written.
+        """
+
+
+class ConsolidatedWorkbook(OutputSink):
+    """
+    Writes the records of a whole batch of emails into one .xlsx file, in a single pass.
+    Uses an openpyxl write-only workbook: appended rows are streamed to disk, so memory
+    stays flat however many rows are written. By default all records go to one sheet
+    with a "Source File" column; with `sheet_per_email`, each email gets its own sheet.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(self, output_path: str, append: bool = False, sheet_per_email: bool = False):
+        super().__init__(output_path, append)
+        self.sheet_per_email = sheet_per_email
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+        self.sheet_titles = set()
+
+    def _sheet_title(self, name: str) -> str:
+        """
+        Returns a valid sheet title for `name`, unique within the workbook.
+        """
+        title = name.translate(INVALID_SHEET_TITLE_CHARS)[:MAX_SHEET_TITLE_LENGTH] or "Sheet"
+        suffix = 1
+        candidate = title
+        # Sheet titles are compared case-insensitively by Excel
+        while candidate.lower() in self.sheet_titles:
+            suffix += 1
+            marker = f" ({suffix})"
+            candidate = title[: MAX_SHEET_TITLE_LENGTH - len(marker)] + marker
+        self.sheet_titles.add(candidate.lower())
+        return candidate
+
+    def _new_sheet(self, name: str, headers: List[str]):
+        self.sheet = self.workbook.create_sheet(self._sheet_title(name))
+        # Same header style as pandas.DataFrame.to_excel
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = Font(bold=True)
+            cell.border = Border(*(Side(style="thin"),) * 4)
+            cell.alignment = Alignment(horizontal="center", vertical="top")
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+        self.sheet_rows = 1
+
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        """
+        Appends the normalized records of one email.
+        """
+        source_name = os.path.basename(source_file)
+        # In sheet-per-email mode, the email's sheet is created with its first record
+        email_sheet_pending = self.sheet_per_email
+        for record in records:
+            row = _record_row(source_name, record)
+            if self.sheet_per_email:
+                if email_sheet_pending:
+                    self._new_sheet(os.path.splitext(source_name)[0], ORDERED_HEADERS)
+                    email_sheet_pending = False
+                row = row[1:]
+            # Roll over to a new sheet when Excel's row limit is reached
+            elif self.sheet is None or self.sheet_rows >= MAX_SHEET_ROWS:
+                self._new_sheet(CONSOLIDATED_SHEET_TITLE, OUTPUT_HEADERS)
+            self.sheet.append(row)
+            self.sheet_rows += 1
+            self.total_rows += 1
+
+    def save(self) -> Optional[str]:
+        """
+        Writes the workbook and returns its path, or None if there was nothing to write.
+        A write-only workbook can only be saved once.
+        """
+        if not self.total_rows:
+            print("⚠️ Warning: No data records to write to Excel.")
+            return None
+        try:
+            self.workbook.save(self.output_path)
+            print(f"\n✅ Excel file '{self.output_path}' generated successfully.")
+            return self.output_path
+        except Exception as e:
+            print(f"\n❌ Error generating Excel file: {e}")
+            return None
+
+
+class ExcelTemplate:
+    """
+    An .xlsx template, parsed once. All package parts except the output sheet are
+    re-zipped once into `base_zip`; the output sheet XML is split around its rows
+    so new rows can be streamed in between `sheet_prefix` and `sheet_suffix`.
+    """
+
+    def __init__(self, template_file: str, sheet_name: str = TEMPLATE_SHEET):
+        with zipfile.ZipFile(template_file) as template_zip:
+            self.sheet_path = self._sheet_path(template_zip, sheet_name)
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as base_zip:
+                for info in template_zip.infolist():
+                    if info.filename != self.sheet_path:
+                        base_zip.writestr(info, template_zip.read(info))
+            self.base_zip = buffer.getvalue()
+            sheet_xml = template_zip.read(self.sheet_path).decode("utf-8")
+
+        # The <dimension> hint would be wrong once rows are added, and is optional
+        sheet_xml = DIMENSION_RE.sub("", sheet_xml, count=1)
+        data_end = sheet_xml.index("</sheetData>")
+        self.sheet_prefix = sheet_xml[:data_end]
+        self.sheet_suffix = sheet_xml[data_end:]
+        row_numbers = [int(number) for number in ROW_NUMBER_RE.findall(self.sheet_prefix)]
+        self.first_data_row = max(row_numbers, default=0) + 1
+        style = CELL_STYLE_RE.search(self.sheet_prefix)
+        self.header_style = style.group(1) if style else "0"
+
+        workbook = load_workbook(template_file, read_only=True)
+        try:
+            self.headers = [
+                cell.value for cell in next(workbook[sheet_name].iter_rows(max_row=1))
+                if cell.value is not None
+            ]
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _sheet_path(template_zip: zipfile.ZipFile, sheet_name: str) -> str:
+        """
+        Resolves the zip member path of a sheet from the workbook relationships.
+        """
+        workbook = ElementTree.fromstring(template_zip.read("xl/workbook.xml"))
+        for sheet in workbook.iter(f"{{{SPREADSHEET_NS}}}sheet"):
+            if sheet.get("name") == sheet_name:
+                relationship_id = sheet.get(f"{{{RELATIONSHIP_NS}}}id")
+                break
+        else:
+            raise ValueError(f"Sheet '{sheet_name}' not found in the Excel template.")
+        relationships = ElementTree.fromstring(
+            template_zip.read("xl/_rels/workbook.xml.rels")
+        )
+        for relationship in relationships.iter(
+            f"{{{PACKAGE_RELATIONSHIP_NS}}}Relationship"
+        ):
+            if relationship.get("Id") == relationship_id:
+                target = relationship.get("Target")
+                if target.startswith("/"):
+                    return target[1:]
+                return posixpath.normpath(posixpath.join("xl", target))
+        raise ValueError(f"Sheet '{sheet_name}' has no part in the Excel template.")
+
+
+def get_template(template_file: str = TEMPLATE_FILE) -> ExcelTemplate:
+    """
+    Returns the parsed Excel template, loading it once per process.
+    """
+    template = _templates.get(template_file)
+    if template is None:
+        template = _templates[template_file] = ExcelTemplate(template_file)
+    return template
+
+
+def _inline_string_cell(reference: str, value: Any) -> str:
+    text = ILLEGAL_CHARACTERS_RE.sub("", str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{reference}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+class TemplateWorkbook(OutputSink):
+    """
+    Writes records into a copy of the Excel template (data/templates/Output Format.xlsx),
+    keeping its header, styles and Data Dictionary sheet. The pre-zipped template parts
+    are copied as raw bytes, then the output sheet is appended to the zip with its rows
+    streamed in as they are added. Cells are written as inline strings.
+    With `source_column`, a "Source File" column follows the template columns.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(
+        self,
+        output_path: str,
+        append: bool = False,
+        source_column: bool = True,
+        template_file: str = TEMPLATE_FILE,
+    ):
+        super().__init__(output_path, append)
+        self.template = get_template(template_file)
+        self.source_column = source_column
+        self.standard_headers = self.template.headers == ORDERED_HEADERS
+        column_count = len(self.template.headers) + (1 if source_column else 0)
+        self.column_letters = [
+            get_column_letter(index) for index in range(1, column_count + 1)
+        ]
+        self.next_row = self.template.first_data_row
+
+        with open(output_path, "wb") as fp:
+            fp.write(self.template.base_zip)
+        self.zip = zipfile.ZipFile(output_path, "a", zipfile.ZIP_DEFLATED)
+        self.sheet = self.zip.open(self.template.sheet_path, "w", force_zip64=True)
+        self.sheet.write(self._header_xml().encode("utf-8"))
+
+    def _header_xml(self) -> str:
+        prefix = self.template.sheet_prefix
+        if not self.source_column:
+            return prefix
+        # Add the Source File header at the end of the last header row
+        header_end = prefix.rindex("</row>")
+        row_start = prefix.rindex("<row ", 0, header_end)
+        header_row = self.template.first_data_row - 1
+        cell = _inline_string_cell(f"{self.column_letters[-1]}{header_row}", SOURCE_FILE_HEADER)
+        cell = cell.replace(" t=", f' s="{self.template.header_style}" t=', 1)
+        row_xml = ROW_SPANS_RE.sub(
+            f' spans="1:{len(self.column_letters)}"', prefix[row_start:header_end], count=1
+        )
+        return prefix[:row_start] + row_xml + cell + prefix[header_end:]
+
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        source_name = os.path.basename(source_file)
+        rows = []
+        for record in records:
+            if self.standard_headers:
+                values = list(_record_values(record))
+            else:
+                _rename_columns(record)
+                values = [record.get(header) for header in self.template.headers]
+            if self.source_column:
+                values.append(source_name)
+            row_number = self.next_row
+            cells = "".join(
+                _inline_string_cell(f"{letter}{row_number}", value)
+                for letter, value in zip(self.column_letters, values)
+                if value is not None
+            )
+            rows.append(f'<row r="{row_number}">{cells}</row>')
+            self.next_row += 1
+            self.total_rows += 1
+            if len(rows) >= TEMPLATE_WRITE_ROWS:
+                self.sheet.write("".join(rows).encode("utf-8"))
+                rows = []
+        self.sheet.write("".join(rows).encode("utf-8"))
+
+    def save(self) -> Optional[str]:
+        try:
+            self.sheet.write(self.template.sheet_suffix.encode("utf-8"))
+            self.sheet.close()
+            self.zip.close()
+        except Exception as e:
+            print(f"\n❌ Error generating Excel file: {e}")
+            return None
+        if not self.total_rows:
+            print("⚠️ Warning: No data records to write to Excel.")
+            os.remove(self.output_path)
+            return None
+        print(f"\n✅ Excel file '{self.output_path}' generated successfully.")
+        return self.output_path
+
+
+class _TextFileSink(OutputSink):
+    """
+    Base class of the line-oriented sinks: rows are written through to the file as
+    they are added. In append mode, rows are added to an existing file.
+    """
+
+    supports_append = True
+
+    def __init__(self, output_path: str, append: bool = False):
+        super().__init__(output_path, append)
+        self.is_new_file = not (
+            self.append
+            and os.path.exists(output_path)
+            and os.path.getsize(output_path) > 0
+        )
+        self.fp = open(
+            output_path, "w" if self.is_new_file else "a", encoding="utf-8", newline=""
+        )
+
+    def save(self) -> Optional[str]:
+        self.fp.close()
+        if not self.total_rows:
+            print(f"⚠️ Warning: No data records to write to '{self.output_path}'.")
+            if self.is_new_file:
+                os.remove(self.output_path)
+            return None
+        print(f"\n✅ Output file '{self.output_path}' generated successfully.")
+        return self.output_path
+
+
+class CsvSink(_TextFileSink):
+    """
+    Writes records to a CSV file with a header row.
+    """
+
+    extension = ".csv"
+
+    def __init__(self, output_path: str, append: bool = False):
+        super().__init__(output_path, append)
+        self.writer = csv.writer(self.fp)
+        if self.is_new_file:
+            self.writer.writerow(OUTPUT_HEADERS)
+
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        source_name = os.path.basename(source_file)
+        for record in records:
+            self.writer.writerow(_record_row(source_name, record))
+            self.total_rows += 1
+
+
+class JsonLinesSink(_TextFileSink):
+    """
+    Writes one JSON object per record, with keys in OUTPUT_HEADERS order.
+    """
+
+    extension = ".jsonl"
+
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        source_name = os.path.basename(source_file)
+        for record in records:
+            row = dict(zip(OUTPUT_HEADERS, _record_row(source_name, record)))
+            self.fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.total_rows += 1
+
+
+class ParquetSink(OutputSink):
+    """
+    Writes records to a Parquet file with pyarrow, one row group per
+    PARQUET_ROW_GROUP_SIZE rows. All columns are strings.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, output_path: str, append: bool = False):
+        super().__init__(output_path, append)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(header, pa.string()) for header in OUTPUT_HEADERS])
+        self.writer = pq.ParquetWriter(output_path, self.schema)
+        self.columns = [[] for _ in OUTPUT_HEADERS]
+        self.buffered_rows = 0
+
+    def add_records(self, source_file: str, records: Iterable[Dict[str, Any]]):
+        source_name = os.path.basename(source_file)
+        for record in records:
+            for column, value in zip(self.columns, _record_row(source_name, record)):
+                column.append(None if value is None else str(value))
+            self.buffered_rows += 1
+            self.total_rows += 1
+            if self.buffered_rows >= PARQUET_ROW_GROUP_SIZE:
+                self._flush()
+
+    def _flush(self):
+        if self.buffered_rows:
+            self.writer.write_table(
+                self.pa.Table.from_arrays(self.columns, schema=self.schema)
+            )
+            self.columns = [[] for _ in OUTPUT_HEADERS]
+            self.buffered_rows = 0
+
+    def save(self) -> Optional[str]:
+        try:
+            self._flush()
+            self.writer.close()
+        except Exception as e:
+            print(f"\n❌ Error generating Parquet file: {e}")
+            return None
+        if not self.total_rows:
+            print(f"⚠️ Warning: No data records to write to '{self.output_path}'.")
+            os.remove(self.output_path)
+            return None
+        print(f"\n✅ Output file '{self.output_path}' generated successfully.")
+        return self.output_path
+
+
+OUTPUT_SINKS = {
+    "xlsx": ConsolidatedWorkbook,
+    "xlsx_template": TemplateWorkbook,
+    "csv": CsvSink,
+    "jsonl": JsonLinesSink,
+    "parquet": ParquetSink,
+}
+
+
+def create_sink(
+    output_path: str, append: bool = False, sheet_per_email: bool = False
+) -> OutputSink:
+    """
+    Creates a sink of the selected output format. `sheet_per_email` applies to xlsx only.
+    """
+    if _output_format == "xlsx":
+        return ConsolidatedWorkbook(output_path, append, sheet_per_email)
+    return OUTPUT_SINKS[_output_format](output_path, append)
+
+
+def generate_output(records: Iterable[Dict[str, Any]], output_path: str, source_file: str):
+    """
+    Writes the records of one email to `output_path` in the selected output format.
+    The xlsx format keeps the original pandas writer; the other formats stream
+    `records`, which may be a generator.
+    """
+    if _output_format == "xlsx":
+        generate_excel(list(records), output_path)
+        return
+    records = iter(records)
+    first_record = next(records, None)
+    if first_record is None:
+        print("⚠️ Warning: No data records to write.")
+        return
+    records = chain([first_record], records)
+    if _output_format == "xlsx_template":
+        # One email per file: the output matches the template layout exactly
+        sink = TemplateWorkbook(output_path, source_column=False)
+    else:
+        sink = create_sink(output_path)
+    sink.add_records(source_file, records)
+    sink.save()
+
+
 # For independent testing only
 # if __name__ == "__main__":
 #     # This section demonstrates the module's effect
@@ -8,10 +8,40 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
-import re
-import spacy
+import hashlib
+import importlib.util
+import os
 import json
-from typing import Dict, List, Any
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import ItemsView, Mapping
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple, Union
+
+from src.patterns import (
+    DASH_ID_RE,
+    DIGIT_RE,
+    EFFECTIVE_DATE_RE,
+    FIELD_PATTERNS,
+    FieldScanner,
+    LIST_ITEM_RE,
+    LOB_LINE_RE,
+    MEDICAL_GROUP_PPG_RE,
+    MERCIAN_PPG_RE,
+    NAME_SPAN_RE,
+    NETWORK_LIST_RE,
+    NETWORK_PPG_LOB_RE,
+    ORG_AFFILIATION_RE,
+    ORG_WITH_TIN_RE,
+    PROVIDER_LINE_RE,
+    SPECIALTY_LINE_RE,
+    TAXONOMY_CODE_SUFFIX_RE,
+    classify_keyword,
+    strip_html,
+)
+from src.normalizer import KEY_ALIAS_MAP, ORDERED_HEADERS
+from src.preprocessor import LINE_FREE_TEXT, LINE_TABLE_START, PreparedText
 
 # from parser import parse_eml
 # from preprocessor import preprocess_text
@@ -19,33 +49,235 @@ from typing import Dict, List, Any
 NOT_FOUND = "Information not found"
 
 # --- NLP Model Loading ---
-# Load the spaCy model once when the script starts. This is efficient.
-# Try transformer model first, fallback to smaller models if not available
-try:
-    nlp = spacy.load("en_core_web_trf")
-except OSError:
+# The spaCy model is loaded lazily, on the first email that needs the NER fallback
+# (see ner_fallback_fields()), not at import time.
+# The model tier can be pinned with set_model_tier() or the ROSTER_NER_MODEL env var:
+#   "auto" -> try transformer model first, fallback to smaller models if not available
+#   "trf" / "md" / "sm" -> load only that model
+#   "none" -> disable the NER fallback entirely
+# Any other value is passed to spacy.load() as a model name or path.
+MODEL_ENV_VAR = "ROSTER_NER_MODEL"
+SPACY_MODELS = {
+    "trf": "en_core_web_trf",
+    "sm": "en_core_web_sm",
+    "md": "en_core_web_md",
+}
+MODEL_TIERS = ["auto", "trf", "md", "sm", "none"]
+
+# Only the `ner` component (and the embedding layer it listens to) is used,
+# so the remaining pipeline components are never loaded.
+NER_EXCLUDED_COMPONENTS = [
+    "parser",
+    "lemmatizer",
+    "tagger",
+    "attribute_ruler",
+    "morphologizer",
+    "senter",
+]
+
+_nlp = None
+_nlp_loaded = False
+_nlp_name = "none"
+_model_tier = os.environ.get(MODEL_ENV_VAR, "auto")
+
+
+def set_model_tier(tier: str):
+    """
+    Selects the spaCy model tier. The model itself is only loaded on first use.
+    """
+    global _nlp, _nlp_loaded, _nlp_name, _model_tier
+    _model_tier = tier
+    _nlp = None
+    _nlp_loaded = False
+    _nlp_name = "none"
+
+
+def _model_candidates() -> List[str]:
+    """
+    Returns the model names get_nlp() tries, in order, for the selected tier.
+    """
+    if _model_tier == "none":
+        return []
+    if _model_tier == "auto":
+        return list(SPACY_MODELS.values())
+    return [SPACY_MODELS.get(_model_tier, _model_tier)]
+
+
+def resolved_model_name() -> str:
+    """
+    Returns the name of the model get_nlp() loads (or has loaded) for the selected
+    tier, or "none" if the NER fallback is disabled or no model is installed.
+    Model packages are looked up without importing spaCy or loading a model.
+    """
+    if _nlp_loaded:
+        return _nlp_name
+    if importlib.util.find_spec("spacy") is None:
+        return "none"
+    for model_name in _model_candidates():
+        if model_name not in SPACY_MODELS.values():
+            # A model path or a custom package name is used as given
+            return model_name
+        if importlib.util.find_spec(model_name) is not None:
+            return model_name
+    return "none"
+
+
+def get_nlp() -> Optional[Any]:
+    """
+    Returns the spaCy pipeline, loading it on the first call.
+    Returns None if NER is disabled or no model is installed.
+    """
+    global _nlp, _nlp_loaded, _nlp_name
+    if _nlp_loaded:
+        return _nlp
+    _nlp_loaded = True
+
+    if _model_tier == "none":
+        return None
+
     try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
+        import spacy
+    except ImportError:
+        print("spaCy is not installed. NER fallback is disabled.")
+        return None
+
+    for model_name in _model_candidates():
         try:
-            nlp = spacy.load("en_core_web_md")
+            _nlp = spacy.load(model_name, exclude=NER_EXCLUDED_COMPONENTS)
+            _nlp_name = model_name
+            break
         except OSError:
-            print("No spaCy model found. Please install one with:")
-            print("python -m spacy download en_core_web_sm")
-            nlp = None
+            continue
+    else:
+        print("No spaCy model found. Please install one with:")
+        print("python -m spacy download en_core_web_sm")
 
+    return _nlp
 
-def extract_table_data(table_lines: List[str]) -> List[Dict[str, str]]:
+
+# --- NER Result Cache ---
+# Each distinct text goes through the model at most once. Entities are stored as an
+# index of label -> entity texts (in document order), keyed by a content hash, so the
+# ORG and PERSON fallbacks (and repeated texts across emails) share one model run.
+NER_CACHE_MAX_ENTRIES = 1024
+# "model_ns" is the time spent running the model, in nanoseconds
+NER_CACHE_STATS = {"hits": 0, "misses": 0, "model_ns": 0}
+
+_ner_cache = OrderedDict()
+_ner_cache_enabled = True
+
+
+def set_ner_cache(enabled: bool, max_entries: int = NER_CACHE_MAX_ENTRIES):
     """
-    Parses a list of pipe-delimited strings into a list of dictionaries.
+    Enables/disables the cross-call NER cache and sets its size bound.
+    """
+    global _ner_cache_enabled, NER_CACHE_MAX_ENTRIES
+    _ner_cache_enabled = enabled
+    NER_CACHE_MAX_ENTRIES = max_entries
+    _ner_cache.clear()
+
+
+def get_ner_cache_max_entries() -> int:
+    """
+    Returns the current size bound of the NER cache (set with set_ner_cache()).
+    """
+    return NER_CACHE_MAX_ENTRIES
+
+
+def get_ner_cache_stats() -> Dict[str, int]:
+    """
+    Returns a copy of the NER cache hit/miss counters and the model time.
+    """
+    return dict(NER_CACHE_STATS)
+
+
+def build_entity_index(doc) -> Dict[str, List[str]]:
+    """
+    Builds a label -> entity texts index from a spaCy Doc.
+    """
+    entity_index = {}
+    for ent in doc.ents:
+        entity_index.setdefault(ent.label_, []).append(ent.text)
+    return entity_index
+
+
+def get_entity_index(
+    text: str, call_cache: Optional[Dict[str, Dict[str, List[str]]]] = None
+) -> Dict[str, List[str]]:
+    """
+    Returns the entity index for `text`, running the model only on a cache miss.
+    `call_cache` scopes the result to a single extraction call even when the
+    cross-call cache is disabled.
+    """
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    if call_cache is not None and key in call_cache:
+        NER_CACHE_STATS["hits"] += 1
+        return call_cache[key]
+    if _ner_cache_enabled and key in _ner_cache:
+        NER_CACHE_STATS["hits"] += 1
+        _ner_cache.move_to_end(key)
+        entity_index = _ner_cache[key]
+    else:
+        nlp = get_nlp()
+        if nlp is None:
+            return {}
+        NER_CACHE_STATS["misses"] += 1
+        start_ns = time.perf_counter_ns()
+        entity_index = build_entity_index(nlp(text))
+        NER_CACHE_STATS["model_ns"] += time.perf_counter_ns() - start_ns
+        if _ner_cache_enabled:
+            _ner_cache[key] = entity_index
+            if len(_ner_cache) > NER_CACHE_MAX_ENTRIES:
+                _ner_cache.popitem(last=False)
+
+    if call_cache is not None:
+        call_cache[key] = entity_index
+    return entity_index
+
+
+def prefetch_entities(
+    texts: List[str], batch_size: int = 64, n_process: int = 1
+) -> int:
+    """
+    Runs the NER model over many texts at once with `nlp.pipe` and stores the
+    results in the NER cache, so later extraction calls only read from it.
+    Returns the number of texts sent through the model.
+    """
+    nlp = get_nlp()
+    if nlp is None or not _ner_cache_enabled:
+        return 0
+
+    # Only distinct texts that are not already cached go through the model
+    pending = OrderedDict()
+    for text in texts:
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key not in _ner_cache and key not in pending:
+            pending[key] = text
+    if not pending:
+        return 0
+
+    start_ns = time.perf_counter_ns()
+    docs = nlp.pipe(pending.values(), batch_size=batch_size, n_process=n_process)
+    for key, doc in zip(pending.keys(), docs):
+        NER_CACHE_STATS["misses"] += 1
+        _ner_cache[key] = build_entity_index(doc)
+        if len(_ner_cache) > NER_CACHE_MAX_ENTRIES:
+            _ner_cache.popitem(last=False)
+    NER_CACHE_STATS["model_ns"] += time.perf_counter_ns() - start_ns
+
+    return len(pending)
+
+
+def iter_table_records(table_lines: List[str]) -> Iterator[Dict[str, str]]:
+    """
+    Parses pipe-delimited strings into dictionaries, yielding one row at a time.
     """
     if not table_lines:
-        return []
+        return
 
     # Extract headers from the first line, stripping whitespace and filtering empty strings
     header = [h.strip() for h in table_lines[0].split("|") if h.strip()]
 
-    records = []
     # Process the data rows (all lines after the header)
     for line in table_lines[1:]:
         if "---" in line:  # Skip separator lines
@@ -55,21 +287,39 @@ def extract_table_data(table_lines: List[str]) -> List[Dict[str, str]]:
 
         if len(values) == len(header):
             # Zip the headers and values together to create a dictionary for the row
-            record = dict(zip(header, values))
-            records.append(record)
+            yield dict(zip(header, values))
 
-    return records
 
+def extract_table_data(table_lines: List[str]) -> List[Dict[str, str]]:
+    """
+    Parses a list of pipe-delimited strings into a list of dictionaries.
+    """
+    return list(iter_table_records(table_lines))
+
+
+def extract_text_data(text: str, ner_skip_fields: Iterable[str] = ()) -> dict:
+    """
+    Extracts the global fields of a free-text zone: the regex rules first, then the
+    NER fallback for the fields they left empty (except `ner_skip_fields`).
+    """
+    data = extract_text_fields(text)
+    fill_ner_fields(data, text, ner_skip_fields)
+    return data
 
-def extract_text_data(text: str) -> dict:
 
+def extract_text_fields(text: str) -> dict:
+    """
+    Extracts the global fields of a free-text zone with the regex rules only.
+    """
     # Initialize dictionary to hold extracted data
     data = {}
+    # Trigger keyword offsets for every field pattern, indexed once for this text
+    scanner = FieldScanner(text)
 
     # --- Provider Specialty Extraction (robust for multi-provider lines) ---
     if "Provider Specialty" not in data:
         # Try to find all lines with 'Provider:' and extract specialty after NPI
-        provider_lines = re.findall(r"Provider: [^\n]+", text)
+        provider_lines = scanner.findall(PROVIDER_LINE_RE)
         specialties = []
         for line in provider_lines:
             # e.g. Provider: Cyrus Hendricks, M.D / License: D66661 / NPI: 1164444443 / Internal Medicine 207R00000X
@@ -77,32 +327,30 @@ def extract_text_data(text: str) -> dict:
             if len(parts) >= 4:
                 specialty_part = parts[3].strip()
                 # Remove taxonomy code if present
-                specialty = re.sub(r" [0-9A-Z]{10}$", "", specialty_part)
+                specialty = TAXONOMY_CODE_SUFFIX_RE.sub("", specialty_part)
                 specialties.append(specialty)
         # Also check for 'Specialty:' lines
-        spec_lines = re.findall(r"Specialty:?\s*([A-Za-z0-9 .,&/-]+)", text, re.IGNORECASE)
+        spec_lines = scanner.findall(SPECIALTY_LINE_RE)
         specialties.extend([s.strip() for s in spec_lines])
         if specialties:
             data["Provider Specialty"] = ", ".join(sorted(set(specialties)))
 
     # --- Line Of Business Extraction (robust for multiple LOBs) ---
     # Handle both regular apostrophes and smart quotes (Unicode \u2019)
-    lobs = re.findall(r"Network\(s\): PPG#[''\u2019]s / ([A-Za-z0-9 ,&/-]+)", text)
-    lob_line = re.search(r"line of business:?\s*([A-Za-z0-9/\-, &]+)", text, re.IGNORECASE)
+    lobs = scanner.findall(NETWORK_PPG_LOB_RE)
+    lob_line = scanner.search(LOB_LINE_RE)
     if lob_line:
         lobs.append(lob_line.group(1).strip())
     # Also check for LOBs in bullet/numbered lists after 'Network(s):' lines
-    for match in re.finditer(r"Network\(s\):[^\n]*\n((?:\s*[*-] [^\n]+\n?)+)", text):
-        for lob_item in re.findall(r"[*-] ([A-Za-z0-9 ,&/-]+)", match.group(1)):
+    for match in scanner.finditer(NETWORK_LIST_RE):
+        for lob_item in LIST_ITEM_RE.findall(match.group(1)):
             lobs.append(lob_item.strip())
     if lobs:
         # Clean up extracted LOBs and remove duplicates
         cleaned_lobs = []
         for lob in lobs:
-            # Remove HTML entities and extra text
-            cleaned_lob = re.sub(r'&#\d+;', '', lob)  # Remove HTML entities
-            cleaned_lob = re.sub(r'<[^>]+>', '', cleaned_lob)  # Remove HTML tags
-            cleaned_lob = cleaned_lob.strip()
+            # Remove HTML entities and tags
+            cleaned_lob = strip_html(lob)
             if cleaned_lob and cleaned_lob not in cleaned_lobs:
                 cleaned_lobs.append(cleaned_lob)
         data["Line Of Business"] = [', '.join(sorted(set(cleaned_lobs)))]
@@ -112,57 +360,41 @@ def extract_text_data(text: str) -> dict:
     # Avoid false matches with "Medical Group affiliation"
     ppg_ids = []
     # More specific pattern for Mercian Medical Group
-    for match in re.finditer(r"Mercian Medical Group[ \-–—]+([A-Za-z0-9]+)", text):
+    for match in scanner.finditer(MERCIAN_PPG_RE):
         ppg_ids.append(match.group(1))
     # General pattern but avoid "affiliation"
-    for match in re.finditer(r"Medical Group[ \-–—]+([A-Za-z0-9]+)", text):
+    for match in scanner.finditer(MEDICAL_GROUP_PPG_RE):
         candidate = match.group(1)
         if candidate.lower() != "affiliation":
             ppg_ids.append(candidate)
     # Also check for simple "- <ID>" patterns
-    ppg_ids += re.findall(r"- ([A-Za-z0-9]+)(?:\s|$)", text)
+    ppg_ids += scanner.findall(DASH_ID_RE)
     if ppg_ids:
         # Clean up extracted PPG IDs
         cleaned_ppg_ids = []
         for ppg_id in ppg_ids:
             # Remove HTML entities and tags
-            cleaned_id = re.sub(r'&#\d+;', '', ppg_id)
-            cleaned_id = re.sub(r'<[^>]+>', '', cleaned_id)
-            cleaned_id = cleaned_id.strip()
+            cleaned_id = strip_html(ppg_id)
             if cleaned_id and cleaned_id not in cleaned_ppg_ids and cleaned_id.lower() != "affiliation":
                 cleaned_ppg_ids.append(cleaned_id)
         data["PPG ID"] = [', '.join(sorted(set(cleaned_ppg_ids)))]
 
     # --- Organization Name Extraction (improved for Sample-2) ---
     if "Organization Name" not in data:
-        org_match = re.search(r'Medical Group affiliation "([^"]+)"', text)
+        org_match = scanner.search(ORG_AFFILIATION_RE)
         if org_match:
             data["Organization Name"] = org_match.group(1).strip()
 
     # --- Effective Date Extraction (improved for Sample-2) ---
     if data.get("Effective Date", "Information not found") == "Information not found":
-        eff_match = re.search(r"Effective Date:?\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})", text, re.IGNORECASE)
+        eff_match = scanner.search(EFFECTIVE_DATE_RE)
         if eff_match:
             data["Effective Date"] = eff_match.group(1).strip()
 
     # --- Part A: Flexible, Context-Aware Regex Extraction ---
-    # Added patterns for the new attributes.
-    patterns = {
-        "Date": r"(?:Effective|Effective Date|Date):?\s*(\d{1,2}/\d{1,2}/\d{4})",
-        "Term Reason": r"(?:Term Reason|Reason for Termination|Reason)(is)?:?\s*([^\n]+)",
-        # "Provider Name": r"(?:Provider|Physician):?\s*([^/\n]+)",
-        "Provider NPI": r"(?:NPI|Provider NPI|NPI#|NPI Number):?\s*(\d{10})",
-        "Provider Specialty": r"NPI:\s*\d{10}\s*([A-Za-z\s]+?)\s*\d{2}[A-Z0-9]",
-        "State License": r"(?:License|State License):?\s*([A-Za-z0-9]+)",
-        "TIN": r"(?:Tax ID|TIN|Taxation Id|Tax ID Number)\s*#?:?\s*([\d-]+)",
-        "Group NPI": r"(?:Group NPI|Organization NPI|Org NPI):?\s*(\d{10})",
-        "Complete Address": r"(?:Address|Location|Practice Address):?\s*([^\n]+)",
-        "Phone Number": r"(?:Phone|Tel|Contact|Phone Number):?\s*((?:\+?\d{1,3}[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)?\d{3}[\s.-]?\d{4})",
-        "Fax Number": r"(?:Fax|Fax Number):?\s*((?:\+?\d{1,3}[\s.-]?)?(?:\(?\d{2,4}\)?[\s.-]?)?\d{3,4}[\s.-]?\d{4})",
-    }
-
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
+    # Field rules live in the precompiled FIELD_PATTERNS table (src/patterns.py).
+    for key, pattern in FIELD_PATTERNS.items():
+        match = scanner.search(pattern)
         if match:
             # Find the first non-empty group to handle complex regexes
             value = next((g for g in match.groups() if g is not None), None)
@@ -172,51 +404,24 @@ def extract_text_data(text: str) -> dict:
 
     # --- Organization Name Extraction ---
     # Try to extract organization name from patterns like 'with <ORG> (TIN # ...)'
+    # (the NER fallback runs in fill_ner_fields() if this fails)
     if "Organization Name" not in data:
-        org_match = re.search(r"with ([A-Za-z0-9 &]+) \(TIN", text)
+        org_match = scanner.search(ORG_WITH_TIN_RE)
         if org_match:
             data["Organization Name"] = org_match.group(1).strip()
-        elif nlp:
-            # Fallback to NER if spacy model is available
-            doc = nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == "ORG" and "Organization Name" not in data:
-                    data["Organization Name"] = ent.text
-                    break
-
-    # --- Part B: NLP (NER) as a Fallback for Provider Name ---
-    if "Provider Name" not in data and nlp:
-        doc = nlp(text)
-        for ent in doc.ents:
-            if ent.label_ == "PERSON":
-                data["Provider Name"] = ent.text
-                break
 
     # --- Part C: Business Logic ---
-    # 1. Transaction Type Logic
-    if "terminate" in text.lower():
-        data["Transaction Type"] = "Term"
-    elif "add" in text.lower():
-        data["Transaction Type"] = "Add"
-    else:
-        # Defaulting to Update if no other keyword is found
-        data["Transaction Type"] = "Update"
+    # Transaction type and attribute keywords are looked up in the lowercased text
+    # of the scanner (see KEYWORD_RULES)
+    # 1. Transaction Type Logic (defaults to Update if no other keyword is found)
+    data["Transaction Type"] = classify_keyword(scanner.index_text, "Transaction Type")
 
     # 2. Transaction Attribute Logic (dependent on Transaction Type)
     if data["Transaction Type"] == "Update":
-        if "specialty" in text.lower():
-            data["Transaction Attribute"] = "Specialty"
-        elif "address" or "move" in text.lower():
-            data["Transaction Attribute"] = "Address"
-        elif "ppg" in text.lower():
-            data["Transaction Attribute"] = "PPG"
-        elif "phone number" in text.lower():
-            data["Transaction Attribute"] = "Phone Number"
-        elif "lob" in text.lower():
-            data["Transaction Attribute"] = "LOB"
-        else:
-            # Default for Update if no other attribute is mentioned
-            data["Transaction Attribute"] = "Provider"
+        # Defaults to Provider if no other attribute is mentioned
+        data["Transaction Attribute"] = classify_keyword(
+            scanner.index_text, "Transaction Attribute"
+        )
     else:
         # For Add/Term, it's typically not a single attribute change
         data["Transaction Attribute"] = "Provider"
@@ -243,45 +448,314 @@ def extract_text_data(text: str) -> dict:
     return data
 
 
-def extract_information(text: str) -> List[Dict[str, Any]]:
+# --- NER Fallback ---
+# Fields the regex rules could not fill are taken from the first entity of their label.
+# The model is only loaded and run for an email that misses one of these fields, whose
+# tables do not supply it (a table column overrides it in every row) and whose free
+# text holds a name-like span (two consecutive capitalized words) for NER to find.
+NER_FALLBACK_LABELS = {"Organization Name": "ORG", "Provider Name": "PERSON"}
+
+
+def ner_fallback_fields(
+    data: Dict[str, Any], text: str, skip_fields: Iterable[str] = ()
+) -> List[str]:
     """
-    Main dispatcher function. Segregates text, parses zones, and merges results.
+    Returns the fields of `data` that the NER fallback should fill from `text`.
     """
-    table_lines = []
-    free_text_lines = []
+    fields = [
+        field
+        for field in NER_FALLBACK_LABELS
+        if field not in data and field not in skip_fields
+    ]
+    if not fields or not NAME_SPAN_RE.search(text) or get_nlp() is None:
+        return []
+    return fields
 
-    # 1. Segregate the text into table zones and free-text zones
-    for line in text.split("\n"):
-        if line.strip().startswith("|"):
-            table_lines.append(line)
-        else:
-            free_text_lines.append(line)
 
-    non_tabular_text = "\n".join(free_text_lines)
+def fill_ner_fields(data: Dict[str, Any], text: str, skip_fields: Iterable[str] = ()):
+    """
+    Fills the fields the regex rules left empty from the entities of `text`.
+    """
+    # All fields read from the same entity index for this call
+    call_cache = {}
+    for field in ner_fallback_fields(data, text, skip_fields):
+        entities = get_entity_index(text, call_cache).get(NER_FALLBACK_LABELS[field])
+        if entities:
+            data[field] = entities[0]
+
+
+def table_fields(tables: List[List[str]]) -> Set[str]:
+    """
+    Returns the output fields that a column of every table supplies.
+    """
+    fields = None
+    for table_lines in tables:
+        header = {KEY_ALIAS_MAP.get(h.strip()) for h in table_lines[0].split("|")}
+        fields = header if fields is None else fields & header
+    return fields or set()
+
+
+# Column names a table header is recognized by (raw aliases and output headers)
+KNOWN_COLUMNS = frozenset(KEY_ALIAS_MAP).union(ORDERED_HEADERS)
+
+
+def _header_cells(line: str) -> Optional[List[str]]:
+    """
+    Returns the cells of a pipe-delimited line if it looks like a header row
+    (no digits and no empty cells), otherwise None.
+    """
+    if DIGIT_RE.search(line):
+        return None
+    cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+    return cells if all(cells) else None
+
+
+def _row_width(line: str) -> int:
+    """
+    Returns the number of non-empty cells of a pipe-delimited line, the width
+    iter_table_records() compares with the header.
+    """
+    cells = [cell.strip() for cell in line.split("|")]
+    return len(cells) - cells.count("")
+
+
+def segment_text(
+    text: Union[str, Iterable[str], PreparedText]
+) -> Tuple[List[List[str]], str]:
+    """
+    Splits text into tables and the joined free-text zone, in one pass over the
+    table lines of the PreparedText index (a string or an iterable of lines is
+    indexed first). Free-text lines are never sliced out: the zone is the whole
+    text when there is no table, otherwise one slice per run of free-text lines.
+    Each table is a list of pipe-delimited lines whose first line is its header.
+    The first pipe line starts a table. After a break (free text or, with
+    prepare_text(), a blank line), a header-like row (no digits, no empty cells)
+    followed by another table line starts a new table if its cells are all
+    KNOWN_COLUMNS or its column count differs from the current header; other rows
+    after a break continue the current table. Within a run of table lines no new table starts:
+    rows whose width differs from the header (section or colspan rows) are skipped
+    and a repeated header line is dropped.
+    """
+    if isinstance(text, str):
+        prepared = PreparedText(text)
+    elif isinstance(text, PreparedText):
+        prepared = text
+    else:
+        prepared = PreparedText.from_lines(text)
+    buffer = prepared.text
+    line_starts = prepared.line_starts
+    line_kinds = prepared.line_kinds
+    line_count = len(prepared)
+
+    tables = []
+    free_text_spans = []
+    header = None
+    header_width = 0
+    previous = -1  # Index of the previous table line
+    for index in compress(range(line_count), line_kinds):
+        # Free-text lines between two table lines end the current run
+        follows_break = index != previous + 1
+        if follows_break:
+            free_text_spans.append((line_starts[previous + 1], line_starts[index] - 1))
+        previous = index
+        line = buffer[line_starts[index] : line_starts[index + 1] - 1]
+        if tables and "---" in line:  # Separator lines are skipped when parsed
+            tables[-1].append(line)
+            continue
+        if tables and (follows_break or line_kinds[index] == LINE_TABLE_START):
+            cells = _header_cells(line)
+            if (
+                cells is not None
+                and cells != header
+                and (len(cells) != header_width or KNOWN_COLUMNS.issuperset(cells))
+                and index + 1 < line_count
+                and line_kinds[index + 1] != LINE_FREE_TEXT
+            ):
+                tables.append([line])
+                header = cells
+                header_width = len(cells)
+                continue
+        if not tables:
+            tables.append([line])
+            header = [h.strip() for h in line.split("|") if h.strip()]
+            header_width = len(header)
+        elif _row_width(line) != header_width:
+            # Section or colspan row inside the table
+            continue
+        elif DIGIT_RE.search(line) or _header_cells(line) != header:
+            tables[-1].append(line)
+
+    if not tables:
+        return tables, buffer
+    if previous + 1 < line_count:
+        free_text_spans.append((line_starts[previous + 1], line_starts[line_count] - 1))
+    return tables, "\n".join([buffer[start:end] for start, end in free_text_spans])
+
+
+class FreeTextData:
+    """
+    An email split into its tables and free-text zone, with the global fields the regex
+    rules found in the free text. The NER fallback has not run yet (see
+    ner_fallback_text()); iter_information() runs it and parses the tables.
+    """
+
+    __slots__ = ("tables", "text", "data", "table_fields")
+
+    def __init__(
+        self, tables: List[List[str]], text: str, data: Dict[str, Any], fields: Set[str]
+    ):
+        self.tables = tables
+        self.text = text
+        self.data = data
+        self.table_fields = fields
+
+
+def extract_free_text(text: Union[str, Iterable[str], PreparedText]) -> FreeTextData:
+    """
+    Segments the text and extracts the global fields of its free-text zone with the
+    regex rules, without the NER fallback.
+    """
+    # 1. Segregate the text into tables and free-text zones
+    tables, non_tabular_text = segment_text(text)
 
     # 2. Parse the free-text zone to get "global" data
-    global_data = extract_text_data(non_tabular_text)
+    global_data = extract_text_fields(non_tabular_text)
     # --- Address cleanup for Sample-3 ---
     if "Complete Address" in global_data and global_data["Complete Address"].startswith("s "):
         global_data["Complete Address"] = global_data["Complete Address"][2:]
+    return FreeTextData(tables, non_tabular_text, global_data, table_fields(tables))
+
+
+def ner_fallback_text(free_text: FreeTextData) -> Optional[str]:
+    """
+    Returns the free-text zone that iter_information() will run NER on,
+    or None if the email does not need the NER fallback.
+    """
+    if not ner_fallback_fields(free_text.data, free_text.text, free_text.table_fields):
+        return None
+    return free_text.text
+
+
+# --- Parallel Table Parsing ---
+# Emails whose tables hold at least TABLE_PARALLEL_MIN_ROWS rows in total have their
+# tables parsed in a process pool, one table per task, when table workers > 1.
+TABLE_PARALLEL_MIN_ROWS = 20000
+
+_table_workers = 1
 
-    # 3. Parse the table zone to get record-specific data
-    table_records = extract_table_data(table_lines)
 
-    if not table_records:
-        # If no table was found, the global data is the only record
-        return [global_data] if global_data else []
+def set_table_workers(workers: int):
+    """
+    Sets the number of processes used to parse the tables of very large emails
+    (1 parses them in-process).
+    """
+    global _table_workers
+    _table_workers = max(1, workers)
 
-    # 4. Merge global data into each record from the table
-    final_records = []
-    for record in table_records:
-        # Start with a copy of the global data
-        merged_record = global_data.copy()
-        # Update/overwrite with the more specific data from the table row
-        merged_record.update(record)
-        final_records.append(merged_record)
 
-    return final_records
+def iter_tables_records(tables: List[List[str]]) -> Iterator[Dict[str, str]]:
+    """
+    Yields the records of each table in turn, each table parsed with its own header.
+    """
+    if (
+        _table_workers > 1
+        and len(tables) > 1
+        and sum(map(len, tables)) >= TABLE_PARALLEL_MIN_ROWS
+    ):
+        with ProcessPoolExecutor(max_workers=min(_table_workers, len(tables))) as executor:
+            for records in executor.map(extract_table_data, tables):
+                yield from records
+        return
+    for table_lines in tables:
+        yield from iter_table_records(table_lines)
+
+
+# --- Streaming Table Records ---
+# A table row only overrides a few fields of the email's global (free-text) data, so
+# instead of copying global_data into every row, each row is yielded as a read-only
+# overlay on top of the one shared global_data dict.
+class _RecordOverlayItems(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self):
+        row = self._mapping.row
+        shared = self._mapping.shared
+        for key, value in shared.items():
+            yield key, (row[key] if key in row else value)
+        for key, value in row.items():
+            if key not in shared:
+                yield key, value
+
+
+class RecordOverlay(Mapping):
+    """
+    One table row over the email's global data: row values win, global values fill in
+    the rest. Keys and items come in the order of global_data.copy().update(row).
+    """
+
+    __slots__ = ("row", "shared")
+
+    def __init__(self, row: Dict[str, Any], shared: Dict[str, Any]):
+        self.row = row
+        self.shared = shared
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.row:
+            return self.row[key]
+        return self.shared[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.shared
+        for key in self.row:
+            if key not in self.shared:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.shared) + sum(1 for key in self.row if key not in self.shared)
+
+    def items(self) -> ItemsView:
+        return _RecordOverlayItems(self)
+
+
+def iter_information(
+    text: Union[str, Iterable[str], PreparedText, FreeTextData]
+) -> Iterator[Mapping]:
+    """
+    Streaming version of extract_information(): the free-text zone is extracted
+    up front, then table rows are parsed and yielded lazily as RecordOverlay objects
+    that share the global data instead of copying it.
+    `text` is a string, an iterable of its lines, a PreparedText (prepare_text()) or
+    the FreeTextData of an email whose free text was already extracted.
+    """
+    # 1-2. Segregate the text and parse the free-text zone to get "global" data
+    free_text = text if isinstance(text, FreeTextData) else extract_free_text(text)
+    global_data = free_text.data
+    # Fields that every table supplies are overridden in each row, so the NER
+    # fallback skips them
+    fill_ner_fields(global_data, free_text.text, free_text.table_fields)
+
+    # 3. Parse each table with its own header and merge global data into each record
+    has_rows = False
+    for record in iter_tables_records(free_text.tables):
+        has_rows = True
+        yield RecordOverlay(record, global_data)
+
+    if not has_rows and global_data:
+        # If no table row was found, the global data is the only record, so the
+        # fields the NER fallback skipped for the tables are filled after all
+        fill_ner_fields(
+            global_data, free_text.text, NER_FALLBACK_LABELS.keys() - free_text.table_fields
+        )
+        yield global_data
+
+
+def extract_information(
+    text: Union[str, Iterable[str], PreparedText]
+) -> List[Dict[str, Any]]:
+    """
+    Main dispatcher function. Segregates text, parses zones, and merges results.
+    """
+    return [dict(record) for record in iter_information(text)]
 
 
 # For independent testing only
@@ -8,10 +8,24 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
-import re
 import json
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping as MappingABC
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+import pandas as pd
 from dateutil import parser as date_parser
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from src.patterns import (
+    ISO_DATE_RE,
+    MONTH_NAME_DATE_RE,
+    NON_DIGIT_RE,
+    US_DATE_RE,
+    US_SHORT_DATE_RE,
+)
 # from extractor import extract_information
 # from preprocessor import preprocess_text
 # from parser import parse_eml
@@ -85,21 +99,207 @@ KEY_ALIAS_MAP = {
 }
 
 
+# Value normalization applied to each canonical field
+NUMERIC_ID_FIELDS = frozenset(
+    ["Provider NPI", "Group NPI", "TIN", "Phone Number", "Fax Number"]
+)
+DATE_FIELDS = frozenset(["Effective Date", "Term Date"])
+NAME_FIELDS = frozenset(["Provider Name", "Organization Name", "Provider Specialty"])
+LIST_FIELDS = frozenset(["Line Of Business (Medicare/Commercial/Medical)", "PPG ID"])
+
+# --- Roster Record ---
+# Normalized records are RosterRecord objects: one slot per output header instead of a
+# 17-key dict per row. Header names are interned, so lookups by header hit the
+# identity fast path of the string comparison.
+RECORD_FIELDS = tuple(sys.intern(header) for header in ORDERED_HEADERS)
+RECORD_SLOTS = (
+    "transaction_type",
+    "transaction_attribute",
+    "effective_date",
+    "term_date",
+    "term_reason",
+    "provider_name",
+    "provider_npi",
+    "provider_specialty",
+    "state_license",
+    "organization_name",
+    "tin",
+    "group_npi",
+    "complete_address",
+    "phone_number",
+    "fax_number",
+    "ppg_id",
+    "line_of_business",
+)
+_FIELD_SLOTS = dict(zip(RECORD_FIELDS, RECORD_SLOTS))
+_get_row = attrgetter(*RECORD_SLOTS)
+
+
+def _record_from_row(row: Sequence[str]) -> "RosterRecord":
+    return RosterRecord(row)
+
+
+class RosterRecord(MappingABC):
+    """
+    A normalized record, with one value per header in ORDERED_HEADERS order.
+    to_row() returns the values as a tuple. For existing callers, it is also a
+    read-only mapping of header -> value (equal to the dict normalize_data() returns),
+    and to_dict() returns a plain dict.
+    """
+
+    __slots__ = RECORD_SLOTS
+
+    def __init__(self, row: Sequence[str]):
+        (
+            self.transaction_type,
+            self.transaction_attribute,
+            self.effective_date,
+            self.term_date,
+            self.term_reason,
+            self.provider_name,
+            self.provider_npi,
+            self.provider_specialty,
+            self.state_license,
+            self.organization_name,
+            self.tin,
+            self.group_npi,
+            self.complete_address,
+            self.phone_number,
+            self.fax_number,
+            self.ppg_id,
+            self.line_of_business,
+        ) = row
+
+    def to_row(self) -> Tuple[str, ...]:
+        return _get_row(self)
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(zip(RECORD_FIELDS, self.to_row()))
+
+    def __getitem__(self, header: str) -> str:
+        try:
+            return getattr(self, _FIELD_SLOTS[header])
+        except KeyError:
+            raise KeyError(header) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RECORD_FIELDS)
+
+    def __len__(self) -> int:
+        return len(RECORD_FIELDS)
+
+    def __contains__(self, header: object) -> bool:
+        return header in _FIELD_SLOTS
+
+    def __reduce__(self):
+        # Pickled as its row only, without the slot names
+        return _record_from_row, (self.to_row(),)
+
+    def __repr__(self) -> str:
+        return f"RosterRecord({self.to_dict()!r})"
+
+
+# normalize_batch() only switches to the pandas path for batches of at least this size;
+# below it, the fixed per-column cost of pandas makes the scalar path faster
+BATCH_MIN_RECORDS = 1000
+# normalize_stream() normalizes its input in chunks of this many records
+STREAM_CHUNK_RECORDS = 10000
+
+
 def _normalize_numeric_id(value: Any) -> str:
     """Strips non-numeric characters."""
     if isinstance(value, str):
-        return re.sub(r"\D", "", value)
+        return NON_DIGIT_RE.sub("", value)
     return str(value)
 
 
-def _normalize_date(value: Any) -> str:
-    """Parses date and formats to MM/DD/YYYY."""
-    if isinstance(value, str) and value not in ["", "Information not found"]:
+# --- Date Normalization Cache ---
+# Roster emails repeat the same few dates many times, so normalized dates are memoized
+# in a bounded LRU keyed on the raw string. On a miss, the strict formats below are
+# tried first and dateutil's (much slower) parser is only called when none matches.
+DATE_CACHE_MAX_ENTRIES = 4096
+# "fallbacks" counts the misses that needed dateutil
+DATE_CACHE_STATS = {"hits": 0, "misses": 0, "fallbacks": 0}
+
+_date_cache = OrderedDict()
+# Month names and two-digit years are resolved exactly as dateutil resolves them
+_date_parser_info = date_parser.parserinfo()
+
+
+def set_date_cache(max_entries: int = DATE_CACHE_MAX_ENTRIES):
+    """
+    Sets the size bound of the date cache (0 disables it) and clears it.
+    """
+    global DATE_CACHE_MAX_ENTRIES
+    DATE_CACHE_MAX_ENTRIES = max_entries
+    _date_cache.clear()
+
+
+def get_date_cache_stats() -> Dict[str, int]:
+    """
+    Returns a copy of the date cache hit/miss/fallback counters.
+    """
+    return dict(DATE_CACHE_STATS)
+
+
+def _parse_strict_date(value: str) -> Optional[datetime]:
+    """
+    Parses the common roster date formats without dateutil. Returns None when the
+    value is in none of them (or is not a valid date), so the caller falls back.
+    """
+    try:
+        match = US_DATE_RE.fullmatch(value)
+        if match:
+            month, day, year = match.groups()
+            return datetime(int(year), int(month), int(day))
+        match = US_SHORT_DATE_RE.fullmatch(value)
+        if match:
+            month, day, year = match.groups()
+            return datetime(
+                _date_parser_info.convertyear(int(year)), int(month), int(day)
+            )
+        match = ISO_DATE_RE.fullmatch(value)
+        if match:
+            year, month, day = match.groups()
+            return datetime(int(year), int(month), int(day))
+        match = MONTH_NAME_DATE_RE.fullmatch(value)
+        if match:
+            month = _date_parser_info.month(match.group(1))
+            if month is not None:
+                return datetime(int(match.group(3)), month, int(match.group(2)))
+    except ValueError:
+        # e.g. 13/01/2025, which dateutil reads day-first
+        pass
+    return None
+
+
+def _parse_date(value: str) -> str:
+    parsed = _parse_strict_date(value)
+    if parsed is None:
+        DATE_CACHE_STATS["fallbacks"] += 1
         try:
-            return date_parser.parse(value).strftime("%m/%d/%Y")
+            parsed = date_parser.parse(value)
         except (date_parser.ParserError, TypeError):
             return "Information not found"  # Return standard string if parsing fails
-    return "Information not found"
+    return parsed.strftime("%m/%d/%Y")
+
+
+def _normalize_date(value: Any) -> str:
+    """Parses date and formats to MM/DD/YYYY."""
+    if not isinstance(value, str) or value in ["", "Information not found"]:
+        return "Information not found"
+    normalized = _date_cache.get(value)
+    if normalized is not None:
+        DATE_CACHE_STATS["hits"] += 1
+        _date_cache.move_to_end(value)
+        return normalized
+    DATE_CACHE_STATS["misses"] += 1
+    normalized = _parse_date(value)
+    if DATE_CACHE_MAX_ENTRIES > 0:
+        _date_cache[value] = normalized
+        if len(_date_cache) > DATE_CACHE_MAX_ENTRIES:
+            _date_cache.popitem(last=False)
+    return normalized
 
 
 def _normalize_name(value: Any) -> str:
@@ -109,10 +309,18 @@ def _normalize_name(value: Any) -> str:
     return str(value)
 
 
-def normalize_data(raw_data: Dict[str, Any]) -> Dict[str, str]:
+def normalize_data(raw_data: Mapping[str, Any]) -> Dict[str, str]:
     """
     Normalizes both keys and values from a raw data dictionary to produce a clean,
     standardized record that is complete and correctly ordered.
+    Dict version of normalize_record(), kept for existing callers.
+    """
+    return normalize_record(raw_data).to_dict()
+
+
+def normalize_record(raw_data: Mapping[str, Any]) -> RosterRecord:
+    """
+    Normalizes one raw record into a RosterRecord.
     """
     interim_record = {}
 
@@ -122,26 +330,13 @@ def normalize_data(raw_data: Dict[str, Any]) -> Dict[str, str]:
         if not canonical_key or value == NOT_FOUND:
             continue
 
-        if canonical_key in [
-            "Provider NPI",
-            "Group NPI",
-            "TIN",
-            "Phone Number",
-            "Fax Number",
-        ]:
+        if canonical_key in NUMERIC_ID_FIELDS:
             interim_record[canonical_key] = _normalize_numeric_id(value)
-        elif canonical_key in ["Effective Date", "Term Date"]:
+        elif canonical_key in DATE_FIELDS:
             interim_record[canonical_key] = _normalize_date(value)
-        elif canonical_key in [
-            "Provider Name",
-            "Organization Name",
-            "Provider Specialty",
-        ]:
+        elif canonical_key in NAME_FIELDS:
             interim_record[canonical_key] = _normalize_name(value)
-        elif canonical_key in [
-            "Line Of Business (Medicare/Commercial/Medical)",
-            "PPG ID",
-        ]:
+        elif canonical_key in LIST_FIELDS:
             if isinstance(value, list):
                 interim_record[canonical_key] = ", ".join(map(str, value))
             else:
@@ -150,17 +345,146 @@ def normalize_data(raw_data: Dict[str, Any]) -> Dict[str, str]:
             interim_record[canonical_key] = str(value)
 
     # 2. Final pass: Build the final record to guarantee order and completeness
-    final_ordered_record = {}
+    # If the value is missing, empty, or None, it will default to NOT_FOUND.
+    return RosterRecord(
+        [interim_record.get(header) or NOT_FOUND for header in ORDERED_HEADERS]
+    )
+
+
+class _Boxed:
+    """
+    Wraps a raw value that is neither a string nor a list (None, numbers, ...), so
+    pandas keeps it apart from missing values and sends it through the scalar path.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def _canonical_values(raw_data: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Maps raw keys to canonical headers, keeping the last value per header
+    (as normalize_data does), and drops NOT_FOUND values.
+    """
+    canonical_values = {}
+    for raw_key, value in raw_data.items():
+        canonical_key = KEY_ALIAS_MAP.get(raw_key.strip())
+        if not canonical_key:
+            continue
+        if isinstance(value, str):
+            if value != NOT_FOUND:
+                canonical_values[canonical_key] = value
+        elif isinstance(value, list):
+            canonical_values[canonical_key] = value
+        else:
+            canonical_values[canonical_key] = _Boxed(value)
+    return canonical_values
+
+
+def _normalize_other(value: Any) -> str:
+    return str(value)
+
+
+def _normalize_list(value: Any) -> str:
+    if isinstance(value, list):
+        return ", ".join(map(str, value))
+    return str(value)
+
+
+def _normalize_dates(values: pd.Series) -> pd.Series:
+    """
+    Normalizes date strings, parsing each distinct value only once.
+    """
+    parsed = {value: _normalize_date(value) for value in values.unique()}
+    return values.map(parsed)
+
+
+# Per field group: (vectorized op on a Series of strings, scalar op on one raw value)
+_COLUMN_OPS = {
+    "numeric_id": (
+        lambda values: values.str.replace(NON_DIGIT_RE, "", regex=True),
+        _normalize_numeric_id,
+    ),
+    "date": (_normalize_dates, _normalize_date),
+    "name": (
+        lambda values: values.str.split().str.join(" ").str.title(),
+        _normalize_name,
+    ),
+    "list": (lambda values: values, _normalize_list),
+    "other": (lambda values: values, _normalize_other),
+}
+
+
+def _field_group(header: str) -> str:
+    if header in NUMERIC_ID_FIELDS:
+        return "numeric_id"
+    if header in DATE_FIELDS:
+        return "date"
+    if header in NAME_FIELDS:
+        return "name"
+    if header in LIST_FIELDS:
+        return "list"
+    return "other"
+
+
+def normalize_batch(records: List[Mapping[str, Any]]) -> List[RosterRecord]:
+    """
+    Normalizes a list of raw records column by column with pandas string methods,
+    instead of value by value. Returns exactly what [normalize_record(r) for r in records]
+    returns. Batches smaller than BATCH_MIN_RECORDS go through the scalar path.
+    """
+    if len(records) < BATCH_MIN_RECORDS:
+        return [normalize_record(record) for record in records]
+
+    canonical_records = [_canonical_values(record) for record in records]
+    columns = []
     for header in ORDERED_HEADERS:
-        # Get the value from our interim record.
-        # If the value is missing, empty, or None, it will default to NOT_FOUND.
-        value = interim_record.get(header)
-        if value:
-            final_ordered_record[header] = value
+        str_op, scalar_op = _COLUMN_OPS[_field_group(header)]
+        column = pd.Series(
+            [record.get(header) for record in canonical_records], dtype=object
+        )
+        present = column.notna()
+        values = column[present]
+        if pd.api.types.infer_dtype(values, skipna=False) in ("string", "empty"):
+            # Each distinct value is normalized once and its rows share the result,
+            # so values repeated down a table (global data) are not copied per row
+            codes, uniques = pd.factorize(values.to_numpy())
+            normalized_uniques = str_op(pd.Series(uniques, dtype=object)).to_numpy()
+            normalized = pd.Series(normalized_uniques[codes], index=values.index)
         else:
-            final_ordered_record[header] = NOT_FOUND
+            # Lists and boxed values: one scalar call per value
+            normalized = values.map(
+                lambda value: scalar_op(
+                    value.value if isinstance(value, _Boxed) else value
+                )
+            )
+        column[present] = normalized.astype(object)
+        # Missing or empty values become NOT_FOUND, as in normalize_data. Assigning
+        # into the object array keeps one shared NOT_FOUND object (Series.where
+        # would create a new string per row).
+        column_values = column.to_numpy(dtype=object, copy=True)
+        column_values[~(present & (column != "")).to_numpy()] = NOT_FOUND
+        columns.append(column_values.tolist())
+
+    return [RosterRecord(row) for row in zip(*columns)]
+
 
-    return final_ordered_record
+def normalize_stream(
+    records: Iterable[Mapping[str, Any]], chunk_records: int = STREAM_CHUNK_RECORDS
+) -> Iterator[RosterRecord]:
+    """
+    Normalizes an iterable of raw records (e.g. from extractor.iter_information()) in
+    chunks of `chunk_records`, yielding normalized records. Only one chunk of raw
+    records is held in memory at a time.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_records))
+        if not chunk:
+            return
+        yield from normalize_batch(chunk)
 
 
 # For independent testing only
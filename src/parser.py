@@ -8,54 +8,365 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
+import io
 from email import policy
-from email.parser import BytesParser
+from email.parser import BytesHeaderParser, BytesParser
+from typing import BinaryIO, List, Optional, Tuple
 from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector
+from lxml import etree
 
+# --- Streaming Parse Mode ---
+# In streaming mode the .eml file is read line by line and only the raw bytes of
+# text/html and text/plain parts are kept (up to MAX_BODY_BYTES each). Attachments
+# and other non-text parts are skipped without being stored or decoded, and only
+# the selected body part is decoded, so memory stays flat regardless of attachment size.
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Lines longer than this are read in chunks (e.g. base64 attachments without line breaks)
+MAX_LINE_BYTES = 64 * 1024
 
-def parse_eml(file_path: str) -> str:
+_streaming = False
+_max_body_bytes = MAX_BODY_BYTES
+
+# --- HTML-to-Text Engines ---
+# "lxml": walks the lxml element tree directly (no BeautifulSoup object tree). Default.
+# "bs4": the original BeautifulSoup implementation.
+HTML_ENGINES = ["lxml", "bs4"]
+# Strings inside these tags are not text content (BeautifulSoup's get_text() skips them too)
+NON_TEXT_TAGS = {"script", "style", "template"}
+# Whitespace-only strings are kept as-is inside these tags
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = " \n\t\x0c\r"
+
+_html_engine = "lxml"
+
+
+def set_parse_mode(streaming: bool, max_body_bytes: int = MAX_BODY_BYTES):
+    """
+    Selects the default parse mode used by parse_eml().
+    """
+    global _streaming, _max_body_bytes
+    _streaming = streaming
+    _max_body_bytes = max_body_bytes
+
+
+def set_html_engine(engine: str):
+    """
+    Selects the HTML-to-text engine used by parse_eml(): "lxml" or "bs4".
+    """
+    global _html_engine
+    if engine not in HTML_ENGINES:
+        raise ValueError(f"Unknown HTML engine '{engine}'. Choose from {HTML_ENGINES}.")
+    _html_engine = engine
+
+
+def _boundary_level(line: bytes, boundaries: List[bytes]) -> Optional[int]:
+    """
+    Returns the index in `boundaries` of the multipart boundary `line` is a
+    delimiter for (innermost first), or None if it is a regular line.
+    """
+    if not line.startswith(b"--"):
+        return None
+    marker = line.rstrip()
+    for level in range(len(boundaries) - 1, -1, -1):
+        delimiter = b"--" + boundaries[level]
+        if marker == delimiter or marker == delimiter + b"--":
+            return level
+    return None
+
+
+def _stream_text_parts(fp, max_body_bytes: int) -> Tuple[bytes, bytes]:
+    """
+    Walks the MIME structure of an .eml file line by line and returns the raw
+    bytes (headers + body) of the last text/html and last text/plain parts.
+    """
+    html_part = b""
+    plain_part = b""
+
+    boundaries = []  # Boundaries of the enclosing multipart parts, outermost first
+    in_headers = True
+    header_lines = []
+    default_type = "text/plain"
+    part_headers = b""
+    part_type = ""
+    body_lines = []
+    body_size = 0
+    at_line_start = True
+
+    def finish_part(strip_last_newline):
+        # Keep the finished part if it is a text body, replacing any previous one
+        nonlocal html_part, plain_part
+        if part_type not in ("text/html", "text/plain"):
+            return
+        if strip_last_newline and body_lines:
+            # The line break before a boundary belongs to the boundary
+            last_line = body_lines[-1]
+            if last_line.endswith(b"\r\n"):
+                body_lines[-1] = last_line[:-2]
+            elif last_line.endswith(b"\n"):
+                body_lines[-1] = last_line[:-1]
+        raw_part = part_headers + b"".join(body_lines)
+        if part_type == "text/html":
+            html_part = raw_part
+        else:
+            plain_part = raw_part
+
+    while True:
+        line = fp.readline(MAX_LINE_BYTES)
+        if not line:
+            break
+        line_start = at_line_start
+        at_line_start = line.endswith(b"\n")
+
+        level = _boundary_level(line, boundaries) if line_start else None
+        if level is not None:
+            if not in_headers:
+                finish_part(strip_last_newline=True)
+            # A closing delimiter ends its multipart; an opening one starts a new part
+            is_closing = line.rstrip().endswith(b"--" + boundaries[level] + b"--")
+            del boundaries[level + 1 :]
+            if is_closing:
+                boundaries.pop()
+                part_type = ""
+                in_headers = False
+            else:
+                in_headers = True
+                header_lines = []
+                default_type = "text/plain"
+            body_lines = []
+            body_size = 0
+            continue
+
+        if in_headers:
+            if line_start and line.rstrip(b"\r\n") == b"":
+                # End of the header block
+                part_headers = b"".join(header_lines) + line
+                headers = BytesHeaderParser(policy=policy.default).parsebytes(part_headers)
+                headers.set_default_type(default_type)
+                part_type = headers.get_content_type()
+                if headers.get_content_maintype() == "multipart":
+                    boundary = headers.get_boundary()
+                    if boundary:
+                        boundaries.append(boundary.encode("utf-8", "surrogateescape"))
+                    # multipart/digest parts default to message/rfc822
+                    default_type = (
+                        "message/rfc822" if part_type == "multipart/digest" else "text/plain"
+                    )
+                    # The preamble up to the first delimiter is not part of any body
+                    part_type = ""
+                    in_headers = False
+                elif part_type == "message/rfc822":
+                    # The body of an attached message starts with its own headers
+                    header_lines = []
+                    default_type = "text/plain"
+                else:
+                    in_headers = False
+                body_lines = []
+                body_size = 0
+            else:
+                header_lines.append(line)
+            continue
+
+        # Only text bodies are kept, and only up to the size limit
+        if part_type in ("text/html", "text/plain") and body_size < max_body_bytes:
+            line = line[: max_body_bytes - body_size]
+            body_lines.append(line)
+            body_size += len(line)
+
+    if not in_headers:
+        finish_part(strip_last_newline=False)
+
+    return html_part, plain_part
+
+
+def _decode_part(raw_part: bytes):
+    """
+    Decodes the body of a single raw MIME part (Content-Transfer-Encoding only).
+    """
+    if not raw_part:
+        return ""
+    return BytesParser(policy=policy.default).parsebytes(raw_part).get_payload(decode=True)
+
+
+def _html_to_text_bs4(html_body) -> str:
+    """
+    Converts an HTML body to text with BeautifulSoup. HTML tables are converted to
+    pipe-delimited rows.
+    """
+    soup = BeautifulSoup(html_body, "lxml")
+
+    # Find all tables in the HTML
+    for table in soup.find_all("table"):
+        reconstructed_table = []
+        # Iterate through each row (tr) in the table
+        for row in table.find_all("tr"):
+            # Get all cells (td or th) in the row, get their text, and strip whitespace
+            cells = [
+                cell.get_text(strip=True) for cell in row.find_all(["td", "th"])
+            ]
+            # Join the cells with a pipe delimiter to reconstruct the table row
+            reconstructed_table.append("| " + " | ".join(cells) + " |")
+
+        # Replace the original <table> tag with our clean, pipe-delimited text version
+        table.replace_with("\n".join(reconstructed_table) + "\n")
+
+    # Return the text from the modified HTML, which now contains clean tables
+    return soup.get_text()
+
+
+def _text_piece(text: str, strip: bool, preserve_whitespace: bool) -> str:
+    """
+    Normalizes one text node like BeautifulSoup does: whitespace-only strings
+    collapse to a single newline (or space) outside <pre>/<textarea>.
+    """
+    if strip:
+        return text.strip()
+    if not preserve_whitespace and not text.strip(ASCII_SPACES):
+        return "\n" if "\n" in text else " "
+    return text
+
+
+def _collect_text(element, pieces: List[str], strip: bool = False, tables: bool = False):
+    """
+    Appends the text content of `element` (not its tail) to `pieces`, skipping
+    comments and NON_TEXT_TAGS. With `tables`, each table is replaced by its
+    pipe-delimited rows.
+    """
+    preserve = element.tag in PRESERVE_WHITESPACE_TAGS
+    if element.text and element.tag not in NON_TEXT_TAGS:
+        pieces.append(_text_piece(element.text, strip, preserve))
+    # Iterative walk: children are pushed in reverse so they pop in document order,
+    # and each child's tail is pushed before it so it is emitted after its subtree
+    stack = [(child, preserve) for child in reversed(element)]
+    while stack:
+        item, preserve = stack.pop()
+        if isinstance(item, str):
+            pieces.append(_text_piece(item, strip, preserve))
+            continue
+        if item.tail:
+            stack.append((item.tail, preserve))
+        tag = item.tag
+        if not isinstance(tag, str) or tag in NON_TEXT_TAGS:
+            # Comments and processing instructions
+            continue
+        if tables and tag == "table":
+            pieces.append(_table_to_text(item))
+            continue
+        child_preserve = preserve or tag in PRESERVE_WHITESPACE_TAGS
+        if item.text:
+            pieces.append(_text_piece(item.text, strip, child_preserve))
+        stack.extend((child, child_preserve) for child in reversed(item))
+
+
+def _table_to_text(table) -> str:
+    """
+    Converts a table element into pipe-delimited rows, one per (nested) row.
+    """
+    reconstructed_table = []
+    for row in table.iter("tr"):
+        cells = []
+        for cell in row.iter("td", "th"):
+            cell_pieces = []
+            _collect_text(cell, cell_pieces, strip=True)
+            cells.append("".join(cell_pieces))
+        reconstructed_table.append("| " + " | ".join(cells) + " |")
+    return "\n".join(reconstructed_table) + "\n"
+
+
+def _html_to_text_lxml(html_body) -> str:
+    """
+    Converts an HTML body to text by walking the lxml tree directly. Produces the
+    same table rows and text as the BeautifulSoup engine, except for whitespace
+    after </html>, which the lxml tree does not keep (and preprocess_text drops).
+    """
+    encoding = None
+    if isinstance(html_body, bytes):
+        # Pick the encoding the same way BeautifulSoup does
+        encoding = next(iter(EncodingDetector(html_body, is_html=True).encodings), None)
+    try:
+        root = etree.fromstring(
+            html_body, etree.HTMLParser(recover=True, encoding=encoding)
+        )
+    except (etree.XMLSyntaxError, etree.ParserError):
+        root = None
+    if root is None:
+        return _html_to_text_bs4(html_body)
+
+    pieces = []
+    _collect_text(root, pieces, tables=True)
+    return "".join(pieces)
+
+
+def html_to_text(html_body, engine: Optional[str] = None) -> str:
+    """
+    Converts an HTML body to text. HTML tables are converted to pipe-delimited rows.
+    `engine` defaults to the engine set by set_html_engine().
+    """
+    if (engine or _html_engine) == "bs4":
+        return _html_to_text_bs4(html_body)
+    return _html_to_text_lxml(html_body)
+
+
+def parse_eml(
+    file_path: str, streaming: Optional[bool] = None, max_body_bytes: Optional[int] = None
+) -> str:
     """
     Parses an .eml file, intelligently handling both plain text and HTML.
     If an HTML table is found, it's converted to a pipe-delimited text format.
+    `streaming` and `max_body_bytes` default to the mode set by set_parse_mode().
     """
     try:
         with open(file_path, "rb") as fp:
-            msg = BytesParser(policy=policy.default).parse(fp)
+            return parse_eml_fp(fp, streaming, max_body_bytes)
     except FileNotFoundError:
         return ""
 
+
+def parse_eml_bytes(
+    data: bytes, streaming: Optional[bool] = None, max_body_bytes: Optional[int] = None
+) -> str:
+    """
+    Same as parse_eml(), for the content of an .eml file that was already read.
+    """
+    return parse_eml_fp(io.BytesIO(data), streaming, max_body_bytes)
+
+
+def parse_eml_fp(
+    fp: BinaryIO, streaming: Optional[bool] = None, max_body_bytes: Optional[int] = None
+) -> str:
+    """
+    Same as parse_eml(), for an .eml file opened in binary mode.
+    """
+    if streaming is None:
+        streaming = _streaming
+    if max_body_bytes is None:
+        max_body_bytes = _max_body_bytes
+
     # Prioritize HTML body if it exists, as it's more structured
     html_body = ""
     plain_text_body = ""
 
-    for part in msg.walk():
-        content_type = part.get_content_type()
-        if content_type == "text/html":
-            html_body = part.get_payload(decode=True)
-        elif content_type == "text/plain":
-            plain_text_body = part.get_payload(decode=True)
+    if streaming:
+        html_part, plain_part = _stream_text_parts(fp, max_body_bytes)
+    else:
+        msg = BytesParser(policy=policy.default).parse(fp)
+
+    if streaming:
+        # Decode only the part that is actually used
+        html_body = _decode_part(html_part)
+        if not html_body:
+            plain_text_body = _decode_part(plain_part)
+    else:
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            if content_type == "text/html":
+                html_body = part.get_payload(decode=True)
+            elif content_type == "text/plain":
+                plain_text_body = part.get_payload(decode=True)
 
     if html_body:
         # If we have an HTML body, parse it intelligently
-        soup = BeautifulSoup(html_body, "lxml")
-
-        # Find all tables in the HTML
-        for table in soup.find_all("table"):
-            reconstructed_table = []
-            # Iterate through each row (tr) in the table
-            for row in table.find_all("tr"):
-                # Get all cells (td or th) in the row, get their text, and strip whitespace
-                cells = [
-                    cell.get_text(strip=True) for cell in row.find_all(["td", "th"])
-                ]
-                # Join the cells with a pipe delimiter to reconstruct the table row
-                reconstructed_table.append("| " + " | ".join(cells) + " |")
-
-            # Replace the original <table> tag with our clean, pipe-delimited text version
-            table.replace_with("\n".join(reconstructed_table) + "\n")
-
-        # Return the text from the modified HTML, which now contains clean tables
-        return soup.get_text()
+        return html_to_text(html_body)
 
     # If no HTML body, fall back to the plain text version
     return (
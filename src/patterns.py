@@ -0,0 +1,318 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import re
+from typing import Dict, Iterator, List, Match, Optional, Pattern, Tuple
+
+# --- Precompiled Pattern Registry ---
+# Every regex used by the preprocessor, extractor and normalizer is compiled once
+# here, at import time, instead of being rebuilt (or looked up in re's cache) per call.
+
+# Preprocessor
+# Runs of spaces left after the whitespace translation table
+SPACE_RUN_RE = re.compile(r"  +")
+
+# Normalizer
+NON_DIGIT_RE = re.compile(r"\D")
+# Strict date formats tried before dateutil: M/D/YYYY, M/D/YY, YYYY-MM-DD, "Jan 5, 2025".
+# Four-digit years below 1000 are left to dateutil, which reads some of them as 2-digit.
+US_DATE_RE = re.compile(r"([0-9]{1,2})/([0-9]{1,2})/([1-9][0-9]{3})")
+US_SHORT_DATE_RE = re.compile(r"([0-9]{1,2})/([0-9]{1,2})/([0-9]{2})")
+ISO_DATE_RE = re.compile(r"([1-9][0-9]{3})-([0-9]{1,2})-([0-9]{1,2})")
+MONTH_NAME_DATE_RE = re.compile(r"([A-Za-z]+) ([0-9]{1,2}), ([1-9][0-9]{3})")
+
+# Table segmentation: rows without digits are header candidates
+DIGIT_RE = re.compile(r"\d")
+
+# HTML leftovers inside extracted values
+HTML_ENTITY_RE = re.compile(r"&#\d+;")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+# Provider Specialty
+PROVIDER_LINE_RE = re.compile(r"Provider: [^\n]+")
+TAXONOMY_CODE_SUFFIX_RE = re.compile(r" [0-9A-Z]{10}$")
+SPECIALTY_LINE_RE = re.compile(r"Specialty:?\s*([A-Za-z0-9 .,&/-]+)", re.IGNORECASE)
+
+# Line Of Business
+# Handle both regular apostrophes and smart quotes (Unicode ’)
+NETWORK_PPG_LOB_RE = re.compile(r"Network\(s\): PPG#[''’]s / ([A-Za-z0-9 ,&/-]+)")
+LOB_LINE_RE = re.compile(r"line of business:?\s*([A-Za-z0-9/\-, &]+)", re.IGNORECASE)
+NETWORK_LIST_RE = re.compile(r"Network\(s\):[^\n]*\n((?:\s*[*-] [^\n]+\n?)+)")
+LIST_ITEM_RE = re.compile(r"[*-] ([A-Za-z0-9 ,&/-]+)")
+
+# PPG ID
+MERCIAN_PPG_RE = re.compile(r"Mercian Medical Group[ \-–—]+([A-Za-z0-9]+)")
+MEDICAL_GROUP_PPG_RE = re.compile(r"Medical Group[ \-–—]+([A-Za-z0-9]+)")
+DASH_ID_RE = re.compile(r"- ([A-Za-z0-9]+)(?:\s|$)")
+
+# Organization Name
+ORG_AFFILIATION_RE = re.compile(r'Medical Group affiliation "([^"]+)"')
+ORG_WITH_TIN_RE = re.compile(r"with ([A-Za-z0-9 &]+) \(TIN")
+
+# NER fallback: a name-like span (two consecutive capitalized words) for NER to find
+NAME_SPAN_RE = re.compile(r"\b[A-Z][\w.'&-]*[ \t]+[A-Z]")
+
+# Effective Date
+EFFECTIVE_DATE_RE = re.compile(
+    r"Effective Date:?\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})", re.IGNORECASE
+)
+
+# --- Field Rule Table ---
+# Generic "<label>: <value>" rules used by extract_text_data(), in evaluation order.
+# The first non-empty group of the first match becomes the field value.
+# New fields can be added with register_field_pattern() without touching the extractor.
+FIELD_PATTERNS: Dict[str, Pattern] = {
+    "Date": re.compile(
+        r"(?:Effective|Effective Date|Date):?\s*(\d{1,2}/\d{1,2}/\d{4})", re.IGNORECASE
+    ),
+    "Term Reason": re.compile(
+        r"(?:Term Reason|Reason for Termination|Reason)(is)?:?\s*([^\n]+)", re.IGNORECASE
+    ),
+    # "Provider Name": r"(?:Provider|Physician):?\s*([^/\n]+)",
+    "Provider NPI": re.compile(
+        r"(?:NPI|Provider NPI|NPI#|NPI Number):?\s*(\d{10})", re.IGNORECASE
+    ),
+    "Provider Specialty": re.compile(
+        r"NPI:\s*\d{10}\s*([A-Za-z\s]+?)\s*\d{2}[A-Z0-9]", re.IGNORECASE
+    ),
+    "State License": re.compile(
+        r"(?:License|State License):?\s*([A-Za-z0-9]+)", re.IGNORECASE
+    ),
+    "TIN": re.compile(
+        r"(?:Tax ID|TIN|Taxation Id|Tax ID Number)\s*#?:?\s*([\d-]+)", re.IGNORECASE
+    ),
+    "Group NPI": re.compile(
+        r"(?:Group NPI|Organization NPI|Org NPI):?\s*(\d{10})", re.IGNORECASE
+    ),
+    "Complete Address": re.compile(
+        r"(?:Address|Location|Practice Address):?\s*([^\n]+)", re.IGNORECASE
+    ),
+    "Phone Number": re.compile(
+        r"(?:Phone|Tel|Contact|Phone Number):?\s*((?:\+?\d{1,3}[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)?\d{3}[\s.-]?\d{4})",
+        re.IGNORECASE,
+    ),
+    "Fax Number": re.compile(
+        r"(?:Fax|Fax Number):?\s*((?:\+?\d{1,3}[\s.-]?)?(?:\(?\d{2,4}\)?[\s.-]?)?\d{3,4}[\s.-]?\d{4})",
+        re.IGNORECASE,
+    ),
+}
+
+
+# --- Trigger Keywords ---
+# Lowercase literals that every match of a pattern must start with. FieldScanner skips
+# a pattern whose triggers do not occur in the text and otherwise starts its scan at the
+# first trigger offset. A pattern without triggers is scanned over the whole text.
+PATTERN_TRIGGERS: Dict[Pattern, Tuple[str, ...]] = {
+    PROVIDER_LINE_RE: ("provider: ",),
+    SPECIALTY_LINE_RE: ("specialty",),
+    NETWORK_PPG_LOB_RE: ("network(s): ",),
+    LOB_LINE_RE: ("line of business",),
+    NETWORK_LIST_RE: ("network(s):",),
+    MERCIAN_PPG_RE: ("mercian medical group",),
+    MEDICAL_GROUP_PPG_RE: ("medical group",),
+    DASH_ID_RE: ("- ",),
+    ORG_AFFILIATION_RE: ("medical group affiliation",),
+    ORG_WITH_TIN_RE: ("with ",),
+    EFFECTIVE_DATE_RE: ("effective date",),
+    FIELD_PATTERNS["Date"]: ("effective", "date"),
+    FIELD_PATTERNS["Term Reason"]: ("term reason", "reason"),
+    FIELD_PATTERNS["Provider NPI"]: ("npi", "provider npi"),
+    FIELD_PATTERNS["Provider Specialty"]: ("npi:",),
+    FIELD_PATTERNS["State License"]: ("license", "state license"),
+    FIELD_PATTERNS["TIN"]: ("tax id", "tin", "taxation id"),
+    FIELD_PATTERNS["Group NPI"]: ("group npi", "org"),
+    FIELD_PATTERNS["Complete Address"]: ("address", "location", "practice address"),
+    FIELD_PATTERNS["Phone Number"]: ("phone", "tel", "contact"),
+    FIELD_PATTERNS["Fax Number"]: ("fax",),
+}
+
+# Non-ASCII characters that re.IGNORECASE matches to ASCII letters, mapped so the
+# lowercased index text keeps the same length (and offsets) as the original text.
+_IGNORECASE_FOLDS = {"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"}
+_IGNORECASE_FOLD_TABLE = str.maketrans(_IGNORECASE_FOLDS)
+
+
+def register_field_pattern(
+    field: str, pattern: str, flags: int = re.IGNORECASE, triggers: Tuple[str, ...] = ()
+):
+    """
+    Adds (or replaces) a field rule in FIELD_PATTERNS, with optional lowercase
+    trigger keywords for FieldScanner.
+    """
+    compiled = re.compile(pattern, flags)
+    FIELD_PATTERNS[field] = compiled
+    if triggers:
+        PATTERN_TRIGGERS[compiled] = tuple(trigger.lower() for trigger in triggers)
+
+
+class FieldScanner:
+    """
+    Dispatches field patterns by their trigger keywords. The text is lowercased once and
+    the first offset of each trigger is located with str.find; a pattern whose triggers
+    are absent is skipped without a regex scan, otherwise its scan starts at the first
+    trigger offset. Results match re.search/finditer/findall on the full text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        index_text = text
+        if not text.isascii() and any(char in text for char in _IGNORECASE_FOLDS):
+            index_text = text.translate(_IGNORECASE_FOLD_TABLE)
+        self.index_text = index_text.lower()
+        self.keyword_offsets: Dict[str, int] = {}
+
+    def first_offset(self, pattern: Pattern) -> Optional[int]:
+        """
+        Returns the first offset where `pattern` can match, or None if it cannot match.
+        """
+        triggers = PATTERN_TRIGGERS.get(pattern)
+        if not triggers:
+            return 0
+        offsets = []
+        for keyword in triggers:
+            offset = self.keyword_offsets.get(keyword)
+            if offset is None:
+                offset = self.keyword_offsets[keyword] = self.index_text.find(keyword)
+            if offset != -1:
+                offsets.append(offset)
+        return min(offsets) if offsets else None
+
+    def search(self, pattern: Pattern) -> Optional[Match]:
+        offset = self.first_offset(pattern)
+        return None if offset is None else pattern.search(self.text, offset)
+
+    def finditer(self, pattern: Pattern) -> Iterator[Match]:
+        offset = self.first_offset(pattern)
+        return iter(()) if offset is None else pattern.finditer(self.text, offset)
+
+    def findall(self, pattern: Pattern) -> list:
+        offset = self.first_offset(pattern)
+        return [] if offset is None else pattern.findall(self.text, offset)
+
+
+def strip_html(value: str) -> str:
+    """
+    Removes HTML entities and tags left in an extracted value.
+    """
+    return HTML_TAG_RE.sub("", HTML_ENTITY_RE.sub("", value)).strip()
+
+
+# --- Keyword Rule Table ---
+# Business-logic classification of an email by trigger terms. For each field, the
+# (value, terms) rules are in priority order: the field takes the value of the first
+# rule with a term in the text, or KEYWORD_DEFAULTS[field] if none matches. Terms are
+# lowercase words or phrases, matched on word boundaries ("add" does not match
+# "address"), so word forms are listed explicitly.
+KEYWORD_RULES: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {
+    "Transaction Type": [
+        ("Term", ("terminate", "terminated", "terminates")),
+        ("Add", ("add", "added", "adds", "adding")),
+    ],
+    "Transaction Attribute": [
+        ("Specialty", ("specialty", "specialties")),
+        ("Address", ("address", "addresses", "move", "moved", "moves", "moving")),
+        ("PPG", ("ppg", "ppgs")),
+        ("Phone Number", ("phone number", "phone numbers")),
+        ("LOB", ("lob", "lobs")),
+    ],
+}
+KEYWORD_DEFAULTS: Dict[str, str] = {
+    "Transaction Type": "Update",
+    "Transaction Attribute": "Provider",
+}
+
+_compiled_keyword_rules = None
+
+
+def register_keyword_rule(
+    field: str, value: str, terms: Tuple[str, ...], default: Optional[str] = None
+):
+    """
+    Appends a (value, terms) rule to KEYWORD_RULES[field], or extends the terms of
+    the field's existing rule for `value`. `default` replaces the field's default value.
+    """
+    global _compiled_keyword_rules
+    rules = KEYWORD_RULES.setdefault(field, [])
+    terms = tuple(term.lower() for term in terms)
+    for index, (rule_value, rule_terms) in enumerate(rules):
+        if rule_value == value:
+            rules[index] = (value, rule_terms + terms)
+            break
+    else:
+        rules.append((value, terms))
+    if default is not None:
+        KEYWORD_DEFAULTS[field] = default
+    _compiled_keyword_rules = None
+
+
+def _is_word_char(char: str) -> bool:
+    # Same characters as \w
+    return char.isalnum() or char == "_"
+
+
+def _compile_keyword_rule(terms: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Pattern]:
+    """
+    Returns the probe terms of a rule (the terms that contain no other term of the
+    rule, so the text contains a term only if it contains a probe) and the regex of
+    its terms not followed by a word character.
+    """
+    terms = tuple(dict.fromkeys(terms))
+    probes = tuple(
+        term for term in terms if not any(other != term and other in term for other in terms)
+    )
+    alternatives = "|".join(map(re.escape, sorted(terms, key=len, reverse=True)))
+    return probes, re.compile(f"(?:{alternatives})(?!\\w)")
+
+
+def get_compiled_keyword_rules() -> Dict[str, List[Tuple[str, Tuple[str, ...], Pattern]]]:
+    """
+    Returns {field: [(value, probe terms, regex)]} for the current KEYWORD_RULES,
+    built on first use.
+    """
+    global _compiled_keyword_rules
+    if _compiled_keyword_rules is None:
+        _compiled_keyword_rules = {
+            field: [(value, *_compile_keyword_rule(terms)) for value, terms in rules]
+            for field, rules in KEYWORD_RULES.items()
+        }
+    return _compiled_keyword_rules
+
+
+def classify_keyword(lowercase_text: str, field: str) -> Optional[str]:
+    """
+    Returns the value of the first rule of KEYWORD_RULES[field] with a term in an
+    already lowercased text, or the field's default value. Later rules are not tried.
+    A term matches where it is not preceded or followed by a word character ("add"
+    does not match "address" or "ladder").
+    """
+    for value, probes, pattern in get_compiled_keyword_rules().get(field, ()):
+        # Substring checks first: most rules are ruled out without running the regex
+        for probe in probes:
+            if probe in lowercase_text:
+                break
+        else:
+            continue
+        # The regex has no leading \b (it would disable the engine's fast scan), so
+        # the start is checked here; the search resumes one character after a
+        # rejected match
+        match = pattern.search(lowercase_text)
+        while match is not None:
+            start = match.start()
+            if not start or not _is_word_char(lowercase_text[start - 1]):
+                return value
+            match = pattern.search(lowercase_text, start + 1)
+    return KEYWORD_DEFAULTS.get(field)
+
+
+def classify_keywords(lowercase_text: str) -> Dict[str, str]:
+    """
+    Classifies an already lowercased text with KEYWORD_RULES.
+    Returns {field: value} for every field of the rule table.
+    """
+    return {field: classify_keyword(lowercase_text, field) for field in KEYWORD_RULES}
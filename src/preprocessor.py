@@ -8,10 +8,64 @@ Team Members:
     - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
 """
 import argparse
-import re
+from array import array
+from itertools import accumulate
+from operator import methodcaller
+from typing import Iterable, Iterator, List, Optional
+
+from src.patterns import SPACE_RUN_RE
 
 # from parser import parse_eml  # Assuming module_1_parser.py is in the same directory
 
+# --- Whitespace Translation Table ---
+# Maps every character str.splitlines() breaks on to "\n" and every other character
+# str.isspace() accepts (the set matched by \s and removed by str.strip()) to " ", so
+# one split on "\n" and one collapse of space runs give the same lines as the former
+# splitlines()/strip()/re.sub(r"\s+", " ") loop. Whitespace code points lie below U+3001.
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_WHITESPACE_TABLE = str.maketrans(
+    {
+        char: "\n" if char in _LINE_BREAKS else " "
+        for char in map(chr, range(0x3001))
+        if char.isspace() and char not in " \n"
+    }
+)
+# ASCII text without these characters needs no translation
+_ASCII_WHITESPACE = "\t\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+def _stripped_lines(raw_text: str) -> List[str]:
+    """
+    Returns the cleaned lines of `raw_text`, including the empty ones.
+    """
+    # 1. Start with initial character replacements for known artifacts
+    # For example, removing the double asterisks from the sample email
+    cleaned_text = raw_text.replace("**", "")
+
+    # 2. Map line breaks to "\n" and the other whitespace characters to " "; a
+    # "\r\n" pair is one break, so CRLF text has no blank line between its lines
+    if "\r\n" in cleaned_text:
+        cleaned_text = cleaned_text.replace("\r\n", "\n")
+    if not cleaned_text.isascii() or any(
+        char in cleaned_text for char in _ASCII_WHITESPACE
+    ):
+        cleaned_text = cleaned_text.translate(_WHITESPACE_TABLE)
+
+    # 3. Collapse multiple spaces to a single space, in one pass over the whole text
+    cleaned_text = SPACE_RUN_RE.sub(" ", cleaned_text)
+
+    # 4. Split the text into lines and strip them (at most one space is left on
+    # either side)
+    return [line.strip(" ") for line in cleaned_text.split("\n")]
+
+
+def _clean_lines(raw_text: str) -> List[str]:
+    """
+    Returns the cleaned, non-empty lines of `raw_text`.
+    """
+    # 5. Only keep lines that are not empty after cleaning
+    return list(filter(None, _stripped_lines(raw_text)))
+
 
 def preprocess_text(raw_text: str) -> str:
     """
@@ -20,27 +74,90 @@ def preprocess_text(raw_text: str) -> str:
     if not raw_text:
         return ""
 
-    # 1. Start with initial character replacements for known artifacts
-    # For example, removing the double asterisks from the sample email
-    cleaned_text = raw_text.replace("**", "")
+    # 6. Join the cleaned lines back together with a single newline character
+    return "\n".join(_clean_lines(raw_text))
 
-    # 2. Split the text into individual lines
-    lines = cleaned_text.splitlines()
 
-    processed_lines = []
-    for line in lines:
-        # 3. For each line, strip leading/trailing whitespace
-        stripped_line = line.strip()
+def preprocess_lines(raw_text: str) -> Iterator[str]:
+    """
+    Generator version of preprocess_text(): yields the cleaned, non-empty lines, so
+    the extractor can segment them without splitting the joined text again.
+    "\n".join(preprocess_lines(raw_text)) == preprocess_text(raw_text).
+    """
+    if raw_text:
+        yield from _clean_lines(raw_text)
 
-        # 4. Collapse multiple spaces within the line to a single space
-        normalized_line = re.sub(r"\s+", " ", stripped_line)
 
-        # 5. Only keep lines that are not empty after cleaning
-        if normalized_line:
-            processed_lines.append(normalized_line)
+# --- Prepared Text ---
+# Line kinds of the PreparedText index
+LINE_FREE_TEXT = 0
+LINE_TABLE = 1
+# A table line that follows a blank line of the raw text (dropped by preprocessing)
+LINE_TABLE_START = 2
 
-    # 6. Join the cleaned lines back together with a single newline character
-    return "\n".join(processed_lines)
+_starts_with_pipe = methodcaller("startswith", "|")
+
+
+class PreparedText:
+    """
+    Preprocessed text plus an array-backed index of its lines, built once so the
+    extractor can segment it without splitting and re-joining the text.
+    line_starts[i] is the offset of line i in `text`, with one extra entry
+    (len(text) + 1), so line i ends at line_starts[i + 1] - 1. line_kinds[i] is
+    LINE_TABLE for pipe-delimited lines and LINE_FREE_TEXT otherwise; prepare_text()
+    marks the table lines that followed a blank line as LINE_TABLE_START.
+    """
+
+    __slots__ = ("text", "line_starts", "line_kinds")
+
+    def __init__(self, text: str, lines: Optional[List[str]] = None):
+        # `lines`, if given, must be text.split("\n")
+        if lines is None:
+            lines = text.split("\n")
+        self.text = text
+        self.line_starts = array(
+            "q", accumulate(map((1).__add__, map(len, lines)), initial=0)
+        )
+        if "|" in text:
+            self.line_kinds = bytes(map(_starts_with_pipe, map(str.lstrip, lines)))
+        else:
+            self.line_kinds = bytes(len(lines))
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "PreparedText":
+        lines = list(lines)
+        return cls("\n".join(lines), lines)
+
+    def __len__(self) -> int:
+        return len(self.line_kinds)
+
+    def line(self, index: int) -> str:
+        return self.text[self.line_starts[index] : self.line_starts[index + 1] - 1]
+
+
+def prepare_text(raw_text: str) -> PreparedText:
+    """
+    Preprocesses raw text into a PreparedText (prepare_text(raw_text).text ==
+    preprocess_text(raw_text)).
+    """
+    stripped = _stripped_lines(raw_text) if raw_text else []
+    lines = list(filter(None, stripped))
+    prepared = PreparedText("\n".join(lines), lines)
+    if "|" in prepared.text and len(lines) < len(stripped):
+        # Keep the blank lines that separated tables as LINE_TABLE_START marks
+        kinds = bytearray(prepared.line_kinds)
+        index = 0
+        blank = False
+        for line in stripped:
+            if not line:
+                blank = True
+                continue
+            if blank and kinds[index]:
+                kinds[index] = LINE_TABLE_START
+            blank = False
+            index += 1
+        prepared.line_kinds = bytes(kinds)
+    return prepared
 
 
 # For independent testing only
@@ -0,0 +1,239 @@
+"""
+This project is part of HiLabs Hackathon 2025: Free-Text Roster Emails.
+"""
+"""
+Team Members:
+    - Anvit Gupta (anvit_g@cs.iitr.ac.in)
+    - Raman Sharma (raman_s@cs.iitr.ac.in)
+    - Tamakuwala Vraj Shailesh (tamakuwala_vs@cs.iitr.ac.in)
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+from src.normalizer import KEY_ALIAS_MAP, ORDERED_HEADERS, RosterRecord
+from src.patterns import FIELD_PATTERNS, KEYWORD_DEFAULTS, KEYWORD_RULES
+
+# --- Content-Addressed Result Cache ---
+# Normalized records are stored on disk, one JSON file per email, keyed by the hash
+# of the .eml file content plus the pipeline/ruleset version. An unchanged email is
+# therefore never re-parsed, re-extracted or re-normalized. Each record is stored as
+# its row of values, in ORDERED_HEADERS order.
+CACHE_DIR = "data/cache"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Bump when a code change alters the extracted/normalized output
+PIPELINE_VERSION = "4"
+READ_CHUNK_BYTES = 1024 * 1024
+
+RESULT_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+_enabled = True
+_cache_dir = CACHE_DIR
+_max_cache_bytes = MAX_CACHE_BYTES
+_options = ""
+_ruleset_version = None
+_cache_bytes = None  # Running total of the cache size, computed on first store
+
+
+def set_result_cache(
+    enabled: bool,
+    cache_dir: str = CACHE_DIR,
+    max_cache_bytes: int = MAX_CACHE_BYTES,
+    options: str = "",
+):
+    """
+    Configures the result cache. `options` describes the pipeline options that
+    change the output (NER model, HTML engine, ...) and is part of every key.
+    """
+    global _enabled, _cache_dir, _max_cache_bytes, _options, _ruleset_version, _cache_bytes
+    _enabled = enabled
+    _cache_dir = cache_dir
+    _max_cache_bytes = max_cache_bytes
+    _options = options
+    _ruleset_version = None
+    _cache_bytes = None
+
+
+def get_result_cache_stats() -> Dict[str, int]:
+    """
+    Returns a copy of the result cache hit/miss/eviction counters.
+    """
+    return dict(RESULT_CACHE_STATS)
+
+
+def ruleset_version() -> str:
+    """
+    Fingerprints the pipeline version, extraction and keyword rules, output schema and options.
+    """
+    global _ruleset_version
+    if _ruleset_version is None:
+        fingerprint = json.dumps(
+            [
+                PIPELINE_VERSION,
+                {field: pattern.pattern for field, pattern in FIELD_PATTERNS.items()},
+                KEYWORD_RULES,
+                KEYWORD_DEFAULTS,
+                ORDERED_HEADERS,
+                KEY_ALIAS_MAP,
+                _options,
+            ],
+            sort_keys=True,
+        )
+        _ruleset_version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    return _ruleset_version
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(READ_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def result_cache_key(file_path: str, data: Optional[bytes] = None) -> Optional[str]:
+    """
+    Returns the cache key of an .eml file, or None if the cache is disabled.
+    `data` is the file content, if it was already read.
+    """
+    if not _enabled:
+        return None
+    digest = file_sha256(file_path) if data is None else hashlib.sha256(data).hexdigest()
+    return f"{digest}-{ruleset_version()}"
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(_cache_dir, f"{key}.json")
+
+
+def has_records(key: Optional[str]) -> bool:
+    """
+    Returns True if records are cached under `key`, without counting a lookup.
+    """
+    return key is not None and os.path.exists(_cache_path(key))
+
+
+def load_records(key: Optional[str]) -> Optional[List[RosterRecord]]:
+    """
+    Returns the cached normalized records for `key`, or None on a miss.
+    """
+    if key is None:
+        return None
+    path = _cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            records = [RosterRecord(row) for row in json.load(fp)]
+    except (FileNotFoundError, TypeError, ValueError):
+        # Missing, partial or malformed entry (json.JSONDecodeError is a ValueError)
+        RESULT_CACHE_STATS["misses"] += 1
+        return None
+    RESULT_CACHE_STATS["hits"] += 1
+    # Touch the entry so eviction removes the least recently used entries first
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return records
+
+
+def store_records(key: Optional[str], records: List[RosterRecord]):
+    """
+    Stores normalized records under `key`, evicting old entries if the cache is full.
+    """
+    global _cache_bytes
+    if key is None:
+        return
+    os.makedirs(_cache_dir, exist_ok=True)
+    if _cache_bytes is None:
+        _cache_bytes = _scan_cache_size()
+
+    # Write to a temp file first, so concurrent workers never read a partial entry
+    fd, temp_path = tempfile.mkstemp(dir=_cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fp:
+        json.dump([record.to_row() for record in records], fp)
+    _cache_bytes += os.path.getsize(temp_path)
+    os.replace(temp_path, _cache_path(key))
+
+    if _cache_bytes > _max_cache_bytes:
+        _evict()
+
+
+def _scan_cache_size() -> int:
+    return sum(
+        entry.stat().st_size
+        for entry in os.scandir(_cache_dir)
+        if entry.name.endswith(".json")
+    )
+
+
+def _evict():
+    """
+    Deletes the least recently used entries until the cache is below 90% of its limit.
+    """
+    global _cache_bytes
+    entries = []
+    for entry in os.scandir(_cache_dir):
+        if entry.name.endswith(".json"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort()
+
+    _cache_bytes = sum(size for _, size, _ in entries)
+    target_bytes = _max_cache_bytes * 0.9
+    for _, size, path in entries:
+        if _cache_bytes <= target_bytes:
+            break
+        try:
+            os.remove(path)
+            RESULT_CACHE_STATS["evictions"] += 1
+        except FileNotFoundError:
+            pass
+        _cache_bytes -= size
+
+
+# --- Output Stamps ---
+# The cache key of the records an output file was written from is kept in a hidden
+# stamp file next to it (".<output name>.key"). The output path only depends on the
+# .eml file name, so on a cache hit Module 5 is skipped only when the existing output
+# was written from the same records, not merely for a file of the same name.
+def _output_stamp_path(output_file: str) -> str:
+    directory, name = os.path.split(output_file)
+    return os.path.join(directory, f".{name}.key")
+
+
+def output_is_current(output_file: str, key: Optional[str]) -> bool:
+    """
+    Returns True if `output_file` exists and was written from the records cached
+    under `key`.
+    """
+    if key is None or not os.path.exists(output_file):
+        return False
+    try:
+        with open(_output_stamp_path(output_file), "r", encoding="utf-8") as fp:
+            return fp.read() == key
+    except FileNotFoundError:
+        return False
+
+
+def stamp_output(output_file: str, key: Optional[str]):
+    """
+    Records that `output_file` was written from the records cached under `key`
+    (or removes a stale stamp if the cache is disabled).
+    """
+    stamp_path = _output_stamp_path(output_file)
+    if key is None:
+        try:
+            os.remove(stamp_path)
+        except FileNotFoundError:
+            pass
+        return
+    with open(stamp_path, "w", encoding="utf-8") as fp:
+        fp.write(key)
@@ -0,0 +1,83 @@
+import glob
+
+import pytest
+
+from benchmarks.generate_emails import generate_corpus
+from src import extractor
+from src.extractor import iter_information, set_ner_cache
+from src.normalizer import normalize_record
+from src.preprocessor import prepare_text
+
+
+class FakeEntity:
+    def __init__(self, text, label):
+        self.text = text
+        self.label_ = label
+
+
+class FakeDoc:
+    def __init__(self, ents):
+        self.ents = ents
+
+
+class FakeNlp:
+    """
+    Stands in for the spaCy pipeline: tags every known name in the text and counts
+    the texts it is run on.
+    """
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return FakeDoc(
+            [FakeEntity(name, label) for name, label in self.entities if name in text]
+        )
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        return [self(text) for text in texts]
+
+
+@pytest.fixture
+def fake_nlp(monkeypatch):
+    nlp = FakeNlp(
+        [
+            ("Jane Smith", "PERSON"),
+            ("Cyrus Hendricks", "PERSON"),
+            ("Pacific Health Partners", "ORG"),
+            ("Mercian Medical Group", "ORG"),
+        ]
+    )
+    monkeypatch.setattr(extractor, "_nlp", nlp)
+    monkeypatch.setattr(extractor, "_nlp_loaded", True)
+    set_ner_cache(True)
+    yield nlp
+    set_ner_cache(True)
+
+
+SAMPLE_FILES = sorted(glob.glob("data/input/*.eml"))
+
+
+def extract_rows(raw_text):
+    """
+    Runs Modules 2-4 on a parsed email and returns its normalized rows.
+    """
+    return [
+        normalize_record(record).to_row()
+        for record in iter_information(prepare_text(raw_text))
+    ]
+
+
+@pytest.fixture(scope="session")
+def synthetic_files(tmp_path_factory):
+    """
+    A small seeded synthetic corpus, every email with an attachment.
+    """
+    return generate_corpus(
+        str(tmp_path_factory.mktemp("synthetic")),
+        12,
+        attachment_rate=1.0,
+        max_attachment_kb=64,
+    )
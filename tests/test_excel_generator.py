@@ -0,0 +1,94 @@
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from src.excel_generator import (
+    CsvSink,
+    JsonLinesSink,
+    OutputSink,
+    ParquetSink,
+    generate_excel,
+)
+from src.normalizer import ORDERED_HEADERS, RosterRecord
+from src.parser import parse_eml
+from tests.conftest import SAMPLE_FILES, extract_rows
+
+
+@pytest.fixture(scope="module")
+def sample_records():
+    return [
+        (eml_file, [RosterRecord(row) for row in extract_rows(parse_eml(eml_file))])
+        for eml_file in SAMPLE_FILES
+    ]
+
+
+def excel_rows(sample_records, tmp_path):
+    """
+    Writes each email with the original pandas writer and returns all rows read back.
+    """
+    rows = []
+    for index, (_, records) in enumerate(sample_records):
+        output_file = tmp_path / f"{index}.xlsx"
+        generate_excel(records, str(output_file))
+        frame = pd.read_excel(output_file, dtype=str, keep_default_na=False)
+        assert list(frame.columns) == ORDERED_HEADERS
+        rows.extend(tuple(row) for row in frame.itertuples(index=False))
+    return rows
+
+
+def write_sink(sink_class, sample_records, output_file):
+    sink = sink_class(str(output_file))
+    for eml_file, records in sample_records:
+        # Records are streamed from a generator
+        sink.add_records(eml_file, (record for record in records))
+    return sink.save()
+
+
+def test_csv_sink_matches_excel_writer(sample_records, tmp_path):
+    output_file = write_sink(CsvSink, sample_records, tmp_path / "out.csv")
+    with open(output_file, encoding="utf-8", newline="") as fp:
+        header, *rows = list(csv.reader(fp))
+    assert header == ["Source File"] + ORDERED_HEADERS
+    assert [tuple(row[1:]) for row in rows] == excel_rows(sample_records, tmp_path)
+
+
+def test_jsonl_sink_matches_excel_writer(sample_records, tmp_path):
+    output_file = write_sink(JsonLinesSink, sample_records, tmp_path / "out.jsonl")
+    with open(output_file, encoding="utf-8") as fp:
+        rows = [json.loads(line) for line in fp]
+    assert [
+        tuple(row[header] for header in ORDERED_HEADERS) for row in rows
+    ] == excel_rows(sample_records, tmp_path)
+
+
+def test_parquet_sink_matches_excel_writer(sample_records, tmp_path):
+    pytest.importorskip("pyarrow")
+    output_file = write_sink(ParquetSink, sample_records, tmp_path / "out.parquet")
+    frame = pd.read_parquet(output_file)
+    assert list(frame[ORDERED_HEADERS].itertuples(index=False, name=None)) == excel_rows(
+        sample_records, tmp_path
+    )
+
+
+def test_csv_sink_appends_without_a_second_header(sample_records, tmp_path):
+    output_file = tmp_path / "out.csv"
+    write_sink(CsvSink, sample_records[:2], output_file)
+    sink = CsvSink(str(output_file), append=True)
+    for eml_file, records in sample_records[2:]:
+        sink.add_records(eml_file, records)
+    sink.save()
+    with open(output_file, encoding="utf-8", newline="") as fp:
+        rows = list(csv.reader(fp))
+    assert rows[0][0] == "Source File"
+    assert len(rows) == 1 + sum(len(records) for _, records in sample_records)
+
+
+def test_incomplete_sink_fails_when_created(tmp_path):
+    class NoSaveSink(OutputSink):
+        def add_records(self, source_file, records):
+            pass
+
+    with pytest.raises(TypeError):
+        NoSaveSink(str(tmp_path / "out.txt"))
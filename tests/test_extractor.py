@@ -0,0 +1,233 @@
+import base64
+
+import pytest
+
+from src import extractor
+from src.extractor import (
+    extract_free_text,
+    extract_information,
+    fill_ner_fields,
+    iter_information,
+    extract_table_data,
+    iter_tables_records,
+    resolved_model_name,
+    segment_text,
+    set_model_tier,
+)
+from src.normalizer import normalize_record
+from src.parser import html_to_text, parse_eml
+from src.preprocessor import prepare_text, preprocess_text
+from tests.conftest import SAMPLE_FILES
+
+SAMPLE_TEXTS = [preprocess_text(parse_eml(eml_file)) for eml_file in SAMPLE_FILES]
+
+
+FREE_TEXT_EMAIL = (
+    "Hello Team,\n"
+    "Please add Jane Smith to Pacific Health Partners.\n"
+    "NPI: 1234567890\n"
+    "Best Regards"
+)
+TABLE_EMAIL = (
+    "Hello Team,\n"
+    "Please add the providers below, requested by Jane Smith,\n"
+    "with Pacific Health Partners (TIN # 12-3456789)\n"
+    "| Provider Name | NPI | Specialty |\n"
+    "| Jane Smith | 1234567890 | Cardiology |\n"
+    "| John Doe | 1234567891 | Pediatrics |\n"
+    "Best Regards"
+)
+
+
+def test_ner_fills_fields_the_regex_rules_missed(fake_nlp):
+    records = extract_information(FREE_TEXT_EMAIL)
+    assert fake_nlp.calls == 1
+    assert records[0]["Provider Name"] == "Jane Smith"
+    assert records[0]["Organization Name"] == "Pacific Health Partners"
+
+
+def test_ner_skipped_when_tables_supply_the_fields(fake_nlp):
+    records = extract_information(TABLE_EMAIL)
+    assert fake_nlp.calls == 0
+    assert [record["Provider Name"] for record in records] == ["Jane Smith", "John Doe"]
+    assert records[0]["Organization Name"] == "Pacific Health Partners"
+
+
+def test_ner_runs_when_tables_yield_no_rows(fake_nlp):
+    text = TABLE_EMAIL.replace("| Jane Smith |", "| Jane Smith | extra |").replace(
+        "| John Doe |", "| John Doe | extra |"
+    )
+    records = extract_information(text)
+    assert fake_nlp.calls == 1
+    assert len(records) == 1
+    assert records[0]["Provider Name"] == "Jane Smith"
+
+
+def test_ner_skipped_without_a_name_like_span(fake_nlp):
+    records = extract_information("please add the provider\nnpi: 1234567890")
+    assert fake_nlp.calls == 0
+    assert "Provider Name" not in records[0]
+
+
+def test_resolved_model_name(monkeypatch):
+    monkeypatch.setattr(extractor.importlib.util, "find_spec", lambda name: None)
+    set_model_tier("auto")
+    assert resolved_model_name() == "none"
+    monkeypatch.setattr(
+        extractor.importlib.util,
+        "find_spec",
+        lambda name: object() if name in ("spacy", "en_core_web_sm") else None,
+    )
+    assert resolved_model_name() == "en_core_web_sm"
+    set_model_tier("/models/custom")
+    assert resolved_model_name() == "/models/custom"
+    set_model_tier("none")
+    assert resolved_model_name() == "none"
+    set_model_tier("auto")
+
+
+def copied_records(text):
+    """
+    The former eager path: one copy of the global data per table row.
+    """
+    free_text = extract_free_text(text)
+    global_data = free_text.data
+    fill_ner_fields(global_data, free_text.text, free_text.table_fields)
+    records = []
+    for row in iter_tables_records(free_text.tables):
+        record = global_data.copy()
+        record.update(row)
+        records.append(record)
+    return records or [global_data]
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS + [TABLE_EMAIL])
+def test_record_overlays_match_copied_records(text):
+    overlays = list(iter_information(text))
+    expected = copied_records(text)
+    assert [list(record.items()) for record in overlays] == [
+        list(record.items()) for record in expected
+    ]
+    assert [len(record) for record in overlays] == [len(record) for record in expected]
+    assert [normalize_record(record) for record in overlays] == [
+        normalize_record(record) for record in expected
+    ]
+
+
+# --- Table Segmentation ---
+SECTION_ROW_TABLE = (
+    "Please add the providers below.\n"
+    "| Provider Name | NPI | Specialty |\n"
+    "|---|---|---|\n"
+    "| Jane Smith | 1234567890 | Cardiology |\n"
+    "| Primary Care |\n"
+    "| Family Medicine | Pediatrics |\n"
+    "| John Doe | 1234567891 | Pediatrics |\n"
+    "Best Regards"
+)
+SECTION_ROW_HTML = (
+    "<p>Please add the providers below.</p>\n"
+    "<table><tr><th>Provider Name</th><th>NPI</th><th>Specialty</th></tr>"
+    "<tr><td>Jane Smith</td><td>1234567890</td><td>Cardiology</td></tr>"
+    "<tr><td colspan='3'>Primary Care</td></tr>"
+    "<tr><td>John Doe</td><td>1234567891</td><td>Pediatrics</td></tr></table>"
+)
+BACK_TO_BACK_TABLES = (
+    "| Provider Name | NPI |\n"
+    "| Jane Smith | 1234567890 |\n"
+    "\n"
+    "| Provider Name | TIN |\n"
+    "| John Doe | 12-3456789 |\n"
+    "\n"
+    "| Organization Name | Specialty |\n"
+    "| Mercian Medical Group | Cardiology |"
+)
+BACK_TO_BACK_HTML = (
+    "<table><tr><th>Provider Name</th><th>NPI</th></tr>"
+    "<tr><td>Jane Smith</td><td>1234567890</td></tr></table>\n"
+    "<table><tr><th>Provider Name</th><th>TIN</th></tr>"
+    "<tr><td>John Doe</td><td>12-3456789</td></tr></table>\n"
+    "<table><tr><th>Organization Name</th><th>Specialty</th></tr>"
+    "<tr><td>Mercian Medical Group</td><td>Cardiology</td></tr></table>"
+)
+
+
+def single_table_rows(text):
+    """
+    The former segmentation: every pipe line in one table under the first header.
+    """
+    return extract_table_data(
+        [line for line in text.split("\n") if line.strip().startswith("|")]
+    )
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS)
+def test_sample_tables_match_single_table_rows(text):
+    tables, _ = segment_text(prepare_text(text))
+    assert list(iter_tables_records(tables)) == single_table_rows(text)
+
+
+@pytest.mark.parametrize(
+    "text", [SECTION_ROW_TABLE, html_to_text(SECTION_ROW_HTML)], ids=["text", "html"]
+)
+def test_section_rows_do_not_split_a_table(text):
+    tables, _ = segment_text(prepare_text(text))
+    rows = list(iter_tables_records(tables))
+    assert len(tables) == 1
+    assert rows == single_table_rows(text)
+    assert [row["Provider Name"] for row in rows] == ["Jane Smith", "John Doe"]
+
+
+@pytest.mark.parametrize(
+    "text", [BACK_TO_BACK_TABLES, html_to_text(BACK_TO_BACK_HTML)], ids=["text", "html"]
+)
+def test_back_to_back_tables_keep_their_headers(text):
+    tables, _ = segment_text(prepare_text(text))
+    assert [table[0] for table in tables] == [
+        "| Provider Name | NPI |",
+        "| Provider Name | TIN |",
+        "| Organization Name | Specialty |",
+    ]
+    assert list(iter_tables_records(tables)) == [
+        {"Provider Name": "Jane Smith", "NPI": "1234567890"},
+        {"Provider Name": "John Doe", "TIN": "12-3456789"},
+        {"Organization Name": "Mercian Medical Group", "Specialty": "Cardiology"},
+    ]
+
+
+def test_header_like_row_after_free_text_continues_the_table():
+    text = (
+        "| Provider Name | Specialty |\n"
+        "| Jane Smith | Cardiology |\n"
+        "Continued on next page:\n"
+        "| John Doe | Pediatrics |\n"
+        "| Bob Roe | Surgery |"
+    )
+    tables, free_text = segment_text(prepare_text(text))
+    assert len(tables) == 1
+    assert free_text == "Continued on next page:"
+    assert list(iter_tables_records(tables)) == single_table_rows(text)
+    assert [row["Provider Name"] for row in iter_tables_records(tables)] == [
+        "Jane Smith",
+        "John Doe",
+        "Bob Roe",
+    ]
+
+
+def test_crlf_plain_text_body_splits_back_to_back_tables(tmp_path):
+    body = BACK_TO_BACK_TABLES.replace("\n", "\r\n").encode()
+    eml_file = tmp_path / "crlf.eml"
+    eml_file.write_bytes(
+        b"Subject: Roster update\r\n"
+        b"MIME-Version: 1.0\r\n"
+        b"Content-Type: text/plain; charset=utf-8\r\n"
+        b"Content-Transfer-Encoding: base64\r\n\r\n"
+        + base64.encodebytes(body).replace(b"\n", b"\r\n")
+    )
+    raw_text = parse_eml(str(eml_file))
+    assert "\r\n" in raw_text
+    tables, _ = segment_text(prepare_text(raw_text))
+    assert list(iter_tables_records(tables)) == list(
+        iter_tables_records(segment_text(prepare_text(BACK_TO_BACK_TABLES))[0])
+    )
+    assert len(tables) == 3
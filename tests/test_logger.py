@@ -0,0 +1,17 @@
+import logging
+
+from utils.logger import drain_log_records, init_worker_logger
+
+
+def test_caller_lookup_skipped_only_for_pipeline_loggers():
+    srcfile = logging._srcfile
+    logger = init_worker_logger()
+    logger.info("Module 1: Parsing complete.")
+    (record,) = drain_log_records(logger)
+    assert record.funcName == "(unknown function)"
+    assert record.getMessage() == "Module 1: Parsing complete."
+    # The logging module's settings for other loggers are left alone
+    assert logging._srcfile == srcfile
+    assert logging.logThreads and logging.logMultiprocessing
+    other = logging.getLogger("RosterEmailTestLogger")
+    assert other.findCaller()[2] == "test_caller_lookup_skipped_only_for_pipeline_loggers"
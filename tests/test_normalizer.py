@@ -0,0 +1,40 @@
+import pytest
+
+from src import normalizer
+from src.extractor import extract_information
+from src.normalizer import NOT_FOUND, normalize_batch, normalize_record, normalize_stream
+from src.parser import parse_eml
+from src.preprocessor import prepare_text
+from tests.conftest import SAMPLE_FILES
+
+# Values the column-wise path must send through the scalar path or treat as missing
+EDGE_RECORDS = [
+    {"Provider Name": None, "NPI": 1234567890, "Effective Date": ""},
+    {"Provider Name": "  jane   SMITH ", "TIN": "12-345 6789", "PPG ID": ["A1", "B2"]},
+    {"Provider Name": NOT_FOUND, "Effective Date": "Jan 5, 2025", "Term Date": "13/01/2025"},
+    {"Specialty": "cardiology", "Line Of Business": "Medicare", "Unknown Key": "x"},
+    {"Provider Name": "", "Phone Number:": "(555) 123-4567", "Fax Number": 5551234567.0},
+    {},
+]
+
+
+@pytest.fixture(scope="module")
+def raw_records():
+    records = []
+    for eml_file in SAMPLE_FILES:
+        records.extend(extract_information(prepare_text(parse_eml(eml_file))))
+    return records + EDGE_RECORDS
+
+
+def test_normalize_batch_matches_per_record_path(raw_records):
+    # Repeated past BATCH_MIN_RECORDS so the pandas path is taken
+    records = raw_records * (normalizer.BATCH_MIN_RECORDS // len(raw_records) + 1)
+    assert len(records) >= normalizer.BATCH_MIN_RECORDS
+    expected = [normalize_record(record) for record in records]
+    assert normalize_batch(records) == expected
+
+
+def test_normalize_stream_matches_per_record_path(raw_records, monkeypatch):
+    monkeypatch.setattr(normalizer, "BATCH_MIN_RECORDS", 1)
+    expected = [normalize_record(record) for record in raw_records]
+    assert list(normalize_stream(iter(raw_records), chunk_records=4)) == expected
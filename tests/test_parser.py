@@ -0,0 +1,32 @@
+import io
+
+from benchmarks.check_html_engines import html_bodies
+from src.parser import html_to_text, parse_eml, parse_eml_fp
+from src.preprocessor import preprocess_text
+from tests.conftest import SAMPLE_FILES, extract_rows
+
+
+def test_streaming_parse_matches_full_parse(synthetic_files):
+    for eml_file in SAMPLE_FILES + synthetic_files:
+        text = parse_eml(eml_file, streaming=False)
+        assert parse_eml(eml_file, streaming=True) == text, eml_file
+        assert extract_rows(parse_eml(eml_file, streaming=True)) == extract_rows(text)
+
+
+def test_streaming_parse_caps_the_body():
+    body = "Provider: " + "x" * 4096
+    eml = (
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: 8bit\r\n\r\n" + body + "\r\n"
+    ).encode("utf-8")
+    text = parse_eml_fp(io.BytesIO(eml), streaming=True, max_body_bytes=1024)
+    assert body.startswith(text) and len(text) <= 1024
+
+
+def test_lxml_engine_matches_bs4(synthetic_files):
+    for eml_file in SAMPLE_FILES + synthetic_files:
+        for html_body in html_bodies(eml_file):
+            lxml_text = html_to_text(html_body, "lxml")
+            bs4_text = html_to_text(html_body, "bs4")
+            assert preprocess_text(lxml_text) == preprocess_text(bs4_text), eml_file
+            assert extract_rows(lxml_text) == extract_rows(bs4_text), eml_file
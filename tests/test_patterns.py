@@ -0,0 +1,88 @@
+import glob
+import re
+
+import pytest
+
+from src.parser import parse_eml
+from src import patterns
+from src.patterns import (
+    KEYWORD_DEFAULTS,
+    KEYWORD_RULES,
+    PATTERN_TRIGGERS,
+    FieldScanner,
+    classify_keywords,
+    register_keyword_rule,
+)
+from src.preprocessor import preprocess_text
+
+SAMPLE_TEXTS = [
+    preprocess_text(parse_eml(eml_file)) for eml_file in sorted(glob.glob("data/input/*.eml"))
+]
+# Case variants and the non-ASCII characters re.IGNORECASE folds to ASCII letters
+EDGE_TEXTS = [
+    "",
+    "no trigger here",
+    "TAX ID: 12-3456789\nPHONE: 555-123-4567\nnpi 1234567890",
+    "LİCENSE: CA12345\nFAX: 555-123-4567\nKEY Tax İD: 98-7654321",
+    "Reason is: retired\nProvider: Jane Smith / License: D1 / NPI: 1234567890 / "
+    "Internal Medicine 207R00000X",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS + EDGE_TEXTS)
+def test_field_scanner_matches_full_text_scans(text):
+    scanner = FieldScanner(text)
+    for pattern in PATTERN_TRIGGERS:
+        expected = pattern.search(text)
+        match = scanner.search(pattern)
+        assert (match and (match.span(), match.groups())) == (
+            expected and (expected.span(), expected.groups())
+        ), pattern.pattern
+        assert scanner.findall(pattern) == pattern.findall(text), pattern.pattern
+        assert [m.span() for m in scanner.finditer(pattern)] == [
+            m.span() for m in pattern.finditer(text)
+        ], pattern.pattern
+
+
+KEYWORD_TEXTS = [
+    "please add dr. smith",
+    "address change for the clinic",
+    "additional ladder notes",
+    "re-added after review; phone number-moved",
+    "the terminated provider moves to a new ppg",
+    "move_it lobster",
+    "lob: medicare, phone numbers attached",
+]
+
+
+def reference_classification(lowercase_text):
+    """
+    The rule table applied with one word-bounded regex per term.
+    """
+    classification = {}
+    for field, rules in KEYWORD_RULES.items():
+        classification[field] = KEYWORD_DEFAULTS.get(field)
+        for value, terms in rules:
+            if any(
+                re.search(rf"(?<!\w){re.escape(term)}(?!\w)", lowercase_text) for term in terms
+            ):
+                classification[field] = value
+                break
+    return classification
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS + EDGE_TEXTS + KEYWORD_TEXTS)
+def test_classify_keywords_matches_word_bounded_terms(text):
+    text = text.lower()
+    assert classify_keywords(text) == reference_classification(text)
+
+
+def test_registered_keyword_rules_are_used(monkeypatch):
+    monkeypatch.setattr(
+        patterns, "KEYWORD_RULES", {field: list(rules) for field, rules in KEYWORD_RULES.items()}
+    )
+    monkeypatch.setattr(patterns, "KEYWORD_DEFAULTS", dict(KEYWORD_DEFAULTS))
+    monkeypatch.setattr(patterns, "_compiled_keyword_rules", None)
+    assert classify_keywords("please onboard dr. smith")["Transaction Type"] == "Update"
+    register_keyword_rule("Transaction Type", "Add", ("onboard",))
+    assert classify_keywords("please onboard dr. smith")["Transaction Type"] == "Add"
@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import runner
+from src.excel_generator import OutputSink, set_output_format
+from src.extractor import NER_CACHE_MAX_ENTRIES, set_ner_cache
+from src.parser import MAX_BODY_BYTES, set_parse_mode
+from src import result_cache
+from src.result_cache import get_result_cache_stats, set_result_cache
+from tests.conftest import SAMPLE_FILES, extract_rows
+from utils.metrics import new_metrics
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("RosterEmailTestLogger")
+
+
+@pytest.fixture
+def no_result_cache():
+    set_result_cache(enabled=False)
+    yield
+    set_result_cache(enabled=True)
+
+
+def run_chunk(logger, **kwargs):
+    """
+    Runs process_chunk() over the samples and returns the rows emitted per file.
+    """
+    emitted = []
+    runner.process_chunk(
+        SAMPLE_FILES,
+        logger,
+        emit_records=lambda eml_file, records: emitted.append(
+            (eml_file, [record.to_row() for record in records])
+        ),
+        **kwargs,
+    )
+    return emitted
+
+
+def test_batch_ner_parses_each_email_once(fake_nlp, logger, no_result_cache, monkeypatch):
+    expected = run_chunk(logger)
+    set_ner_cache(True)
+    fake_nlp.calls = 0
+    parsed = []
+    parse_eml = runner.parse_eml
+    monkeypatch.setattr(
+        runner, "parse_eml", lambda eml_file: parsed.append(eml_file) or parse_eml(eml_file)
+    )
+
+    assert run_chunk(logger, batch_ner=True) == expected
+    assert sorted(parsed) == SAMPLE_FILES
+    # Every NER text went through nlp.pipe in phase 1, none through nlp() in phase 2
+    assert 0 < fake_nlp.calls <= len(SAMPLE_FILES)
+
+
+def test_batch_ner_without_model_skips_phase_one(logger, no_result_cache, monkeypatch):
+    monkeypatch.setattr(runner, "get_nlp", lambda: None)
+    monkeypatch.setattr(runner, "run_text_modules", pytest.fail)
+    assert runner.prefetch_ner(SAMPLE_FILES, logger, 64, 1) == {}
+
+
+def test_batch_ner_looks_up_each_email_once(fake_nlp, logger, tmp_path, monkeypatch):
+    set_result_cache(enabled=True, cache_dir=str(tmp_path))
+    hashed = []
+    file_sha256 = result_cache.file_sha256
+    monkeypatch.setattr(
+        result_cache,
+        "file_sha256",
+        lambda eml_file: hashed.append(eml_file) or file_sha256(eml_file),
+    )
+    try:
+        count = len(SAMPLE_FILES)
+        for expected_stats in ({"hits": 0, "misses": count}, {"hits": count, "misses": 0}):
+            stats_before = get_result_cache_stats()
+            hashed.clear()
+            run_chunk(logger, batch_ner=True)
+            stats = get_result_cache_stats()
+            assert {
+                key: stats[key] - stats_before[key] for key in expected_stats
+            } == expected_stats
+            assert sorted(hashed) == SAMPLE_FILES
+    finally:
+        set_result_cache(enabled=True)
+
+
+def test_batch_ner_chunks_follow_the_ner_cache_size(logger, monkeypatch):
+    chunks = []
+    monkeypatch.setattr(
+        runner, "process_chunk", lambda eml_files, *args: chunks.append(len(eml_files)) or []
+    )
+    args = argparse.Namespace(
+        async_pipeline=False, batch_ner=True, ner_batch_size=64, ner_n_process=1
+    )
+    set_ner_cache(True, max_entries=3)
+    try:
+        runner.process_files(SAMPLE_FILES, logger, args)
+    finally:
+        set_ner_cache(True, max_entries=NER_CACHE_MAX_ENTRIES)
+    assert chunks == [3, 3, len(SAMPLE_FILES) - 6]
+
+
+class ChunkRecorder:
+    """
+    Stands in for the process pool: records the size of each chunk it is given.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def map(self, func, chunks, *args):
+        self.chunks.extend(len(chunk) for chunk in chunks)
+        return []
+
+
+def test_parallel_batch_ner_chunks_fit_in_the_ner_cache(logger):
+    executor = ChunkRecorder()
+    args = argparse.Namespace(
+        async_pipeline=False, batch_ner=True, ner_batch_size=64, ner_n_process=1
+    )
+    set_ner_cache(True, max_entries=3)
+    try:
+        runner.process_files(SAMPLE_FILES, logger, args, executor)
+    finally:
+        set_ner_cache(True, max_entries=NER_CACHE_MAX_ENTRIES)
+    assert executor.chunks == [3, 3, len(SAMPLE_FILES) - 6]
+
+
+ROW_DELAY_NS = 50_000_000
+
+
+def test_lazy_row_parsing_is_timed_as_extract(logger, no_result_cache, monkeypatch):
+    # The sample with the most records, so most rows are parsed during normalization
+    eml_file = max(SAMPLE_FILES, key=lambda f: len(extract_rows(runner.parse_eml(f))))
+    iter_information = runner.iter_information
+
+    def slow_rows(free_text):
+        for record in iter_information(free_text):
+            time.sleep(ROW_DELAY_NS / 1e9)
+            yield record
+
+    monkeypatch.setattr(runner, "iter_information", slow_rows)
+    metrics = new_metrics(eml_file)
+    records = runner.run_modules(eml_file, logger, metrics)
+    assert len(records) > 1
+    assert metrics["stages_ns"]["extract"] >= len(records) * ROW_DELAY_NS
+    assert metrics["stages_ns"]["normalize"] < ROW_DELAY_NS
+
+
+class RecordingSink(OutputSink):
+    """
+    Keeps the rows added per email, and the number of emails in flight (read but not
+    yet written) after each read.
+    """
+
+    def __init__(self):
+        self.emitted = []
+        self.reads = 0
+        self.in_flight = []
+
+    def read(self):
+        self.reads += 1
+        self.in_flight.append(self.reads - len(self.emitted))
+
+    def add_records(self, source_file, records):
+        self.emitted.append((source_file, [record.to_row() for record in records]))
+
+    def save(self):
+        return None
+
+
+def run_async(logger, eml_files, monkeypatch, stream_parse=False, queue_size=16):
+    """
+    Runs process_files_async() in a thread pool (so the test can patch the worker)
+    and returns its sink and the data each worker call received.
+    """
+    sink = RecordingSink()
+    read_eml_bytes = runner.read_eml_bytes
+    monkeypatch.setattr(
+        runner,
+        "read_eml_bytes",
+        lambda *args: sink.read() or read_eml_bytes(*args),
+    )
+    args = argparse.Namespace(queue_size=queue_size, workers=1, stream_parse=stream_parse)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        asyncio.run(runner.process_files_async(eml_files, logger, args, executor, sink))
+    return sink
+
+
+@pytest.mark.parametrize("stream_parse", [False, True])
+def test_async_pipeline_matches_sequential(logger, no_result_cache, monkeypatch, stream_parse):
+    expected = run_chunk(logger)
+    received = []
+    run_in_worker = runner._run_modules_in_worker
+    monkeypatch.setattr(
+        runner,
+        "_run_modules_in_worker",
+        lambda eml_file, data: received.append(data) or run_in_worker(eml_file, data),
+    )
+    set_parse_mode(stream_parse)
+    try:
+        sink = run_async(logger, SAMPLE_FILES, monkeypatch, stream_parse=stream_parse)
+    finally:
+        set_parse_mode(False, MAX_BODY_BYTES)
+    assert sink.emitted == expected
+    # With --stream_parse the workers read the files themselves
+    assert all((data is None) == stream_parse for data in received)
+
+
+def test_async_pipeline_bounds_waiting_results(logger, no_result_cache, monkeypatch):
+    queue_size = 3
+    eml_files = SAMPLE_FILES * 3
+    run_in_worker = runner._run_modules_in_worker
+
+    def delay_first(eml_file, data):
+        if eml_file == eml_files[0] and not delayed:
+            delayed.append(eml_file)
+            time.sleep(0.3)
+        return run_in_worker(eml_file, data)
+
+    delayed = []
+    monkeypatch.setattr(runner, "_run_modules_in_worker", delay_first)
+    sink = run_async(logger, eml_files, monkeypatch, queue_size=queue_size)
+    assert [eml_file for eml_file, _ in sink.emitted] == eml_files
+    # The results behind the delayed email waited without more emails being read
+    assert max(sink.in_flight) == queue_size
+
+
+def write_email(eml_file, npi):
+    eml_file.write_text(
+        "Subject: Roster update\nContent-Type: text/plain\n\n"
+        f"Please add Dr. Jane Smith, NPI: {npi}, effective 01/01/2025.\n"
+    )
+
+
+@pytest.mark.parametrize("output_format", ["xlsx", "csv"])
+def test_cached_output_is_rewritten_when_it_holds_other_records(
+    logger, tmp_path, monkeypatch, output_format
+):
+    set_result_cache(enabled=True, cache_dir=str(tmp_path / "cache"))
+    set_output_format(output_format)
+    monkeypatch.setattr(runner, "OUTPUT_DIR", str(tmp_path / "output"))
+    eml_file = tmp_path / "a.eml"
+    other_folder = tmp_path / "other"
+    other_folder.mkdir()
+    other_file = other_folder / "a.eml"
+    try:
+        for source, npi, cache_hit, written in [
+            (eml_file, "1234567890", False, True),
+            (eml_file, "1111111111", False, True),
+            # v1 again: a cache hit, but the output holds the v2 records
+            (eml_file, "1234567890", True, True),
+            (eml_file, "1234567890", True, False),
+            # A same-named email of another folder, whose content is cached too
+            (other_file, "1111111111", True, True),
+            (eml_file, "1234567890", True, True),
+        ]:
+            write_email(source, npi)
+            _, output_file, metrics = runner.process_file(str(source), logger)
+            assert metrics["cache_hit"] == cache_hit
+            assert ("output" in metrics["stages_ns"]) == written
+            assert output_file.endswith("a" + runner.output_extension())
+            if output_format == "csv":
+                with open(output_file, encoding="utf-8") as fp:
+                    content = fp.read()
+                assert npi in content
+            else:
+                assert npi in open_xlsx_text(output_file)
+    finally:
+        set_output_format("xlsx")
+        set_result_cache(enabled=True)
+
+
+def open_xlsx_text(output_file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(output_file, read_only=True)
+    return " ".join(
+        str(value) for row in workbook.active.iter_rows(values_only=True) for value in row
+    )
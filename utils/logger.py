@@ -1,25 +1,259 @@
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import sys
+import time
 
 LOG_DIR = "data/logs"
 LOG_FILE = os.path.join(LOG_DIR, "pipeline.log")
 
+# --- Logging Configuration ---
+# Records are put on an in-memory queue by the pipeline (QueueHandler) and written by
+# one background thread (QueueListener), so no file I/O happens on the hot path. The
+# writer buffers its output and rotates the log by size. Pool workers buffer their
+# records in memory and return them with their results; the main process hands them
+# to the same queue, so the one writer thread merges the log of every process.
+LOG_FORMATS = ["json", "text"]
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# The writer flushes every LOG_FLUSH_RECORDS records, on WARNING and above, and
+# when no record has arrived for LOG_FLUSH_SECONDS
+LOG_FLUSH_RECORDS = 256
+LOG_FLUSH_SECONDS = 1.0
+LOG_BUFFER_BYTES = 64 * 1024
+TEXT_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+TEXT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def init_logger():
+_log_level = logging.INFO
+_listener = None
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class JsonFormatter(logging.Formatter):
     """
-    Initializes and returns a logger that writes to a log file.
+    Formats a record as one JSON object: time, level, process id and message
+    (plus the traceback, if any). The time up to the second is computed once per
+    second, not once per record.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        second = int(record.created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime(TEXT_DATE_FORMAT, self.converter(second))
+        return f"{self._second_text},{int(record.msecs):03d}"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return _json_encode(entry)
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
     """
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR)
+    RotatingFileHandler that writes through a large buffer and flushes it every
+    `flush_records` records (and on WARNING and above) instead of after every record.
+    The file size is counted as records are written, since seeking the stream to
+    check it (as RotatingFileHandler does) would flush the buffer.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        flush_records: int = LOG_FLUSH_RECORDS,
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+        )
+        self.flush_records = flush_records
+        self._pending_records = 0
+        self._size = os.path.getsize(filename) if os.path.exists(filename) else 0
+
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=LOG_BUFFER_BYTES,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message.encode(self.encoding))
+            if self.maxBytes and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += size
+            self._pending_records += 1
+            if (
+                self._pending_records >= self.flush_records
+                or record.levelno >= logging.WARNING
+            ):
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._size = 0
+
+    def flush(self):
+        super().flush()
+        self._pending_records = 0
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records as they are. The default one formats each
+    message before enqueueing it; here the %-style formatting is left to the writer
+    thread. The queue never leaves the process, so records need not be picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that flushes its handlers whenever no record has arrived for
+    LOG_FLUSH_SECONDS, so a quiet pipeline (e.g. watch mode) still shows its log.
+    """
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            try:
+                return self.queue.get(block, timeout=LOG_FLUSH_SECONDS)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+
+def _unknown_caller(stack_info=False, stacklevel=1):
+    return "(unknown file)", 0, "(unknown function)", None
+
+
+def _skip_caller_lookup(logger):
+    """
+    The log formats never show the caller's file, line or function, so the records
+    of `logger` are created without them; looking up the caller walks the stack on
+    every call. Only the pipeline's own loggers are changed, not the logging
+    module's settings for the rest of the process.
+    """
+    logger.findCaller = _unknown_caller
+
+
+def set_log_level(level: str):
+    """
+    Sets the level of the pipeline and worker loggers (e.g. "INFO", "WARNING").
+    Messages below it are dropped before they are formatted.
+    """
+    global _log_level
+    _log_level = logging.getLevelName(level.upper())
+    if not isinstance(_log_level, int):
+        raise ValueError(f"Unknown log level: '{level}'. Choose from {LOG_LEVELS}.")
+    logging.getLogger("RosterEmailLogger").setLevel(_log_level)
+    logging.getLogger("RosterEmailWorkerLogger").setLevel(_log_level)
+
+
+def init_logger(
+    log_format: str = "json",
+    log_file: str = LOG_FILE,
+    max_bytes: int = LOG_MAX_BYTES,
+    backup_count: int = LOG_BACKUP_COUNT,
+):
+    """
+    Initializes and returns a logger that writes to a log file through a background
+    thread. The log of the previous run is rotated to `<log_file>.1`.
+    """
+    global _listener
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: '{log_format}'. Choose from {LOG_FORMATS}.")
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
     logger = logging.getLogger("RosterEmailLogger")
-    logger.setLevel(logging.INFO)
+    _skip_caller_lookup(logger)
+    logger.setLevel(_log_level)
+    logger.propagate = False
     # Avoid duplicate handlers if called multiple times
     if not logger.handlers:
-        file_handler = logging.FileHandler(LOG_FILE, mode="w", encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(message)s", "%Y-%m-%d %H:%M:%S"
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler = BufferedRotatingFileHandler(log_file, max_bytes, backup_count)
+        # Each run starts a new log file, like the previous "w" mode FileHandler
+        if file_handler._size:
+            file_handler.doRollover()
+        if log_format == "json":
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(TEXT_LOG_FORMAT, TEXT_DATE_FORMAT))
+        log_queue = queue.SimpleQueue()
+        _listener = FlushingQueueListener(log_queue, file_handler)
+        _listener.start()
+        logger.addHandler(LazyQueueHandler(log_queue))
+
+    return logger
+
+
+def close_logger():
+    """
+    Writes out the queued records, stops the writer thread and closes the log file.
+    """
+    global _listener
+    logger = logging.getLogger("RosterEmailLogger")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def init_worker_logger():
+    """
+    Initializes a logger for pool worker processes that buffers records in memory
+    instead of writing to the log file, so the parent process can write them.
+    """
+    logger = logging.getLogger("RosterEmailWorkerLogger")
+    _skip_caller_lookup(logger)
+    logger.setLevel(_log_level)
+    logger.propagate = False
+    if not logger.handlers:
+        logger.addHandler(logging.handlers.BufferingHandler(capacity=sys.maxsize))
 
     return logger
+
+
+def drain_log_records(logger):
+    """
+    Returns and clears the records buffered by a worker logger.
+    """
+    handler = logger.handlers[0]
+    records = handler.buffer
+    handler.buffer = []
+    return records
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List
+
+from utils.logger import LOG_DIR
+
+# --- Per-Stage Instrumentation ---
+# One metrics record per email: per-stage durations (perf_counter_ns), input sizes,
+# record count and whether the NER fallback ran. Records are written as JSON lines.
+METRICS_FILE = os.path.join(LOG_DIR, "metrics.jsonl")
+PROFILE_FILE = os.path.join(LOG_DIR, "profile.pstats")
+# "extract" includes the table rows parsed lazily while "normalize" consumes them, and
+# "extract_ner" is the part of "extract" spent running the NER model
+PIPELINE_STAGES = [
+    "parse",
+    "preprocess",
+    "extract",
+    "extract_ner",
+    "normalize",
+    "output",
+]
+
+
+def new_metrics(input_file: str) -> Dict[str, Any]:
+    """
+    Returns an empty metrics record for one email.
+    """
+    return {
+        "file": input_file,
+        "input_bytes": os.path.getsize(input_file),
+        "text_chars": 0,
+        "cache_hit": False,
+        "cache_key": None,
+        "ner_invoked": False,
+        "ner_model_runs": 0,
+        "records": 0,
+        "stages_ns": {},
+    }
+
+
+@contextmanager
+def timed_stage(metrics: Dict[str, Any], stage: str):
+    """
+    Adds the duration of the `with` block to `stage` in the metrics record.
+    """
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        stages = metrics["stages_ns"]
+        stages[stage] = stages.get(stage, 0) + time.perf_counter_ns() - start_ns
+
+
+def timed_iter(metrics: Dict[str, Any], stage: str, iterable: Iterable) -> Iterator:
+    """
+    Yields the items of `iterable`, adding the time spent producing each one to
+    `stage` in the metrics record (for lazy stages consumed inside another stage).
+    """
+    stages = metrics["stages_ns"]
+    iterator = iter(iterable)
+    while True:
+        start_ns = time.perf_counter_ns()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stages[stage] = stages.get(stage, 0) + time.perf_counter_ns() - start_ns
+        yield item
+
+
+def init_metrics_file(metrics_file: str = METRICS_FILE):
+    """
+    Starts a new metrics file for this run.
+    """
+    os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+    open(metrics_file, "w", encoding="utf-8").close()
+
+
+def write_metrics(
+    metrics_records: List[Dict[str, Any]], metrics_file: str = METRICS_FILE
+):
+    """
+    Appends metrics records to the metrics file, one JSON object per line.
+    """
+    with open(metrics_file, "a", encoding="utf-8") as fp:
+        for metrics in metrics_records:
+            fp.write(json.dumps(metrics) + "\n")
+
+
+def percentile(sorted_values: List[int], pct: float) -> int:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+def stage_summary(metrics_records: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """
+    Returns {stage: {"count", "p50", "p95", "max"}} in nanoseconds, over the emails
+    that ran each stage.
+    """
+    summary = {}
+    for stage in PIPELINE_STAGES:
+        durations = sorted(
+            metrics["stages_ns"][stage]
+            for metrics in metrics_records
+            if stage in metrics["stages_ns"]
+        )
+        if durations:
+            summary[stage] = {
+                "count": len(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "max": durations[-1],
+            }
+    return summary